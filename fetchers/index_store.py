@@ -0,0 +1,195 @@
+import array
+import json
+import os
+import struct
+import sys
+
+from fetchers import metrics
+
+# File layout: magic, version, header length, JSON header, then the columns:
+#   names    - NUL-separated UTF-8 string table, one entry per unique row
+#   urls     - NUL-separated UTF-8, stored without the common wiki prefix
+#   prices   - int64 per row, NO_PRICE for missing
+#   rows     - uint32 row ids; each page shard is a [start, start + count) slice
+#   id_names - NUL-separated UTF-8 item names from the ID mapping (version 2+)
+#   ids      - uint32 item ID per id_names entry (version 2+)
+MAGIC = b"RSIX"
+VERSION = 2
+READABLE_VERSIONS = {1, 2}
+NO_PRICE = -1
+WIKI_PREFIX = "https://runescape.wiki/w/"
+
+_PREAMBLE = struct.Struct("<4sHI")
+
+
+def _strip_prefix(url):
+    return url[len(WIKI_PREFIX):] if url.startswith(WIKI_PREFIX) else url
+
+
+def _add_prefix(path):
+    return path if "://" in path else WIKI_PREFIX + path
+
+
+def _to_bytes(values, typecode):
+    column = array.array(typecode, values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_bytes(data, typecode):
+    column = array.array(typecode)
+    column.frombytes(data)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
+
+
+@metrics.timed("cache.index.write")
+def write(path, pages, timestamp, ids=None, ids_timestamp=None):
+    """Writes page shards ({key: {"etag", "last_modified", "items"}}) with duplicate rows stored once.
+
+    `ids` is an optional {item name: item ID} mapping stored alongside the rows,
+    downloaded at `ids_timestamp` (defaults to `timestamp`).
+    """
+    row_of = {}
+    names, urls, prices, row_ids = [], [], [], []
+    page_meta = {}
+
+    for key, page in pages.items():
+        start = len(row_ids)
+        for item in page.get("items", []):
+            row_key = (item["name"], item["url"], item["price"])
+            row = row_of.get(row_key)
+            if row is None:
+                row = row_of[row_key] = len(names)
+                names.append(item["name"])
+                urls.append(_strip_prefix(item["url"]))
+                prices.append(NO_PRICE if item["price"] is None else item["price"])
+            row_ids.append(row)
+
+        page_meta[key] = {
+            "etag": page.get("etag"),
+            "last_modified": page.get("last_modified"),
+            "start": start,
+            "count": len(row_ids) - start,
+        }
+
+    columns = [
+        "\0".join(names).encode("utf-8"),
+        "\0".join(urls).encode("utf-8"),
+        _to_bytes(prices, "q"),
+        _to_bytes(row_ids, "I"),
+        "\0".join(ids or {}).encode("utf-8"),
+        _to_bytes((ids or {}).values(), "I"),
+    ]
+    header = json.dumps({
+        "timestamp": timestamp,
+        "ids_timestamp": timestamp if ids_timestamp is None else ids_timestamp,
+        "rows": len(names),
+        "pages": page_meta,
+        "sizes": [len(column) for column in columns],
+    }).encode("utf-8")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for column in columns:
+            f.write(column)
+    os.replace(tmp_path, path)
+
+
+class IndexStore:
+    """Read-only view of an index file; columns are decoded on first access"""
+
+    def __init__(self, header, blob):
+        self.timestamp = header["timestamp"]
+        self.ids_timestamp = header.get("ids_timestamp", 0)  # files written before it was recorded count as stale
+        self._header = header
+        self._blob = blob
+        self._columns = {}
+        self._items = None
+
+    def _column(self, position):
+        if position not in self._columns:
+            sizes = self._header["sizes"]
+            start = sum(sizes[:position])
+            self._columns[position] = self._blob[start:start + sizes[position]]
+        return self._columns[position]
+
+    def __len__(self):
+        return self._header["rows"]
+
+    @property
+    def names(self):
+        if "names" not in self._columns:
+            blob = bytes(self._column(0)).decode("utf-8")
+            self._columns["names"] = blob.split("\0") if len(self) else []
+        return self._columns["names"]
+
+    @property
+    def urls(self):
+        if "urls" not in self._columns:
+            blob = bytes(self._column(1)).decode("utf-8")
+            stored = blob.split("\0") if len(self) else []
+            self._columns["urls"] = [_add_prefix(path) for path in stored]
+        return self._columns["urls"]
+
+    @property
+    def prices(self):
+        if "prices" not in self._columns:
+            self._columns["prices"] = _from_bytes(self._column(2), "q")
+        return self._columns["prices"]
+
+    def _row_ids(self):
+        if "rows" not in self._columns:
+            self._columns["rows"] = _from_bytes(self._column(3), "I")
+        return self._columns["rows"]
+
+    def items(self):
+        """Returns every unique row as {"name", "url", "price"}, in first-seen page order"""
+        if self._items is None:
+            self._items = [
+                {"name": name, "url": url, "price": None if price == NO_PRICE else price}
+                for name, url, price in zip(self.names, self.urls, self.prices)
+            ]
+        return self._items
+
+    @property
+    def ids(self):
+        """Returns {item name: item ID} from the stored mapping, empty for version 1 files"""
+        if "ids" not in self._columns:
+            if len(self._header["sizes"]) < 6 or not self._header["sizes"][5]:
+                self._columns["ids"] = {}
+            else:
+                names = bytes(self._column(4)).decode("utf-8").split("\0")
+                self._columns["ids"] = dict(zip(names, _from_bytes(self._column(5), "I")))
+        return self._columns["ids"]
+
+    def pages(self):
+        """Returns the stored page shards in the same shape write() accepts"""
+        items = self.items()
+        row_ids = self._row_ids()
+        return {
+            key: {
+                "etag": meta["etag"],
+                "last_modified": meta["last_modified"],
+                "items": [items[row] for row in row_ids[meta["start"]:meta["start"] + meta["count"]]],
+            }
+            for key, meta in self._header["pages"].items()
+        }
+
+
+@metrics.timed("cache.index.read")
+def load(path):
+    with open(path, "rb") as f:
+        data = f.read()
+
+    magic, version, header_len = _PREAMBLE.unpack_from(data)
+    if magic != MAGIC or version not in READABLE_VERSIONS:
+        raise ValueError(f"Unsupported index file: {path}")
+
+    offset = _PREAMBLE.size
+    header = json.loads(data[offset:offset + header_len])
+    return IndexStore(header, memoryview(data)[offset + header_len:])
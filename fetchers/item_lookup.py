@@ -0,0 +1,252 @@
+import atexit
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+from fetchers import metrics, rs3_index
+from fetchers.rs3_scraper import ItemNotFound, canonical_title, get_exchange_info
+from fetchers.search_index import normalize
+
+CACHE_FILE = rs3_index.resource_path("data/rs3_item_cache.json")
+ITEM_TTL = 30 * 60  # seconds an Exchange lookup is reused before refetching
+SAVE_DELAY = 2.0    # seconds of lookups gathered into one rewrite of the cache file
+
+# Failed lookups are remembered and not retried until their backoff runs out; it doubles with every
+# consecutive failure. Missing pages (misspelled names) back off slowly, other errors quickly.
+NOT_FOUND_TTL = 10 * 60
+NOT_FOUND_MAX_TTL = 24 * 3600
+ERROR_TTL = 60
+ERROR_MAX_TTL = 15 * 60
+
+_lock = threading.Lock()
+_cache = None      # canonical key -> {"fetched": ts, "data": {...}}
+_failures = {}     # canonical key -> {"failed": ts, "retry_at": ts, "attempts": n, "missing": bool, "error": str}
+_ids = {}          # item_id -> canonical key
+_inflight = {}     # canonical key -> Future shared by concurrent callers
+_dirty = False
+_save_timer = None
+_write_lock = threading.Lock()  # keeps snapshots reaching the file in the order they were taken
+
+
+class LookupFailed(ValueError):
+    """An Exchange lookup that failed, either just now or within its backoff (cached=True)"""
+
+    def __init__(self, message: str, missing: bool = False, cached: bool = False):
+        super().__init__(message)
+        self.missing = missing
+        self.cached = cached
+
+
+def resolve(name: str) -> str:
+    """Maps any spelling of an item name to its canonical wiki title.
+
+    Names found in the market index take the index's exact title; anything
+    else falls back to MediaWiki normalization.
+    """
+    if os.path.exists(rs3_index.CACHE_FILE):
+        entry = rs3_index.get_index().search_index.get(name)
+        if entry:
+            return entry["name"]
+    return canonical_title(name)
+
+
+def _key(title: str) -> str:
+    return title.lower()
+
+
+def _load():
+    global _cache
+    if _cache is not None:
+        return
+    _cache = {}
+    _failures.clear()
+    if os.path.exists(CACHE_FILE):
+        try:
+            with metrics.span("cache.items.read"), open(CACHE_FILE, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            _cache = stored.get("items", {})
+            _failures.update(stored.get("failures", {}))
+        except (OSError, ValueError):
+            _cache = {}
+    for key, record in _cache.items():
+        if record["data"].get("item_id"):
+            _ids[record["data"]["item_id"]] = key
+
+
+def _schedule_save():
+    """Marks the cache changed and arranges one write SAVE_DELAY seconds out; call with _lock held"""
+    global _dirty, _save_timer
+    _dirty = True
+    if _save_timer is None:
+        _save_timer = threading.Timer(SAVE_DELAY, _flush_quietly)
+        _save_timer.daemon = True
+        _save_timer.start()
+
+
+@metrics.timed("cache.items.write")
+def flush():
+    """Writes pending lookups to the cache file now instead of waiting for the scheduled save"""
+    global _dirty, _save_timer
+    with _write_lock:
+        with _lock:
+            if _save_timer is not None:
+                _save_timer.cancel()
+                _save_timer = None
+            if not _dirty or _cache is None:
+                return
+            payload = json.dumps({"items": _cache, "failures": _failures})
+            _dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+            tmp_path = CACHE_FILE + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, CACHE_FILE)
+        except OSError:
+            with _lock:
+                _dirty = True
+            raise
+
+
+@atexit.register
+def _flush_quietly():
+    # A cache that cannot be written only costs refetches later; it must not take a lookup down with it.
+    try:
+        flush()
+    except OSError:
+        pass
+
+
+def cached_item(name: Optional[str] = None, item_id: Optional[int] = None) -> Optional[dict]:
+    """Returns the last stored lookup for a name or item ID, however old, without touching the network"""
+    key = _key(resolve(name)) if name is not None else None
+    with _lock:
+        _load()
+        if key is None:
+            key = _ids.get(item_id)
+        record = _cache.get(key)
+        return dict(record["data"]) if record else None
+
+
+def _record_failure(key: str, error: Exception):
+    previous = _failures.get(key)
+    attempts = previous["attempts"] + 1 if previous else 1
+    missing = isinstance(error, ItemNotFound)
+    base, cap = (NOT_FOUND_TTL, NOT_FOUND_MAX_TTL) if missing else (ERROR_TTL, ERROR_MAX_TTL)
+    now = time.time()
+    _failures[key] = {
+        "failed": now,
+        "retry_at": now + min(cap, base * 2 ** (attempts - 1)),
+        "attempts": attempts,
+        "missing": missing,
+        "error": str(error),
+    }
+
+
+def failure(name: str) -> Optional[dict]:
+    """Returns the failure record for a name whose last lookup failed, or None"""
+    key = _key(resolve(name))
+    with _lock:
+        _load()
+        record = _failures.get(key)
+        return dict(record) if record else None
+
+
+def clear_failure(name: str):
+    """Forgets a failed lookup so the next get_item() retries straight away"""
+    key = _key(resolve(name))
+    with _lock:
+        _load()
+        if _failures.pop(key, None):
+            _schedule_save()
+
+
+def resolve_name(item_id: int) -> Optional[str]:
+    """Returns the name for an item ID from local data only (index mapping, then earlier lookups), or None"""
+    if os.path.exists(rs3_index.CACHE_FILE):
+        name = rs3_index.get_index().names.get(item_id)
+        if name:
+            return name
+    data = cached_item(item_id=item_id)
+    return data["name"] if data else None
+
+
+def resolve_id(name: str) -> Optional[tuple]:
+    """Returns (item ID, canonical name) from local data only, or None if the name is unknown offline.
+
+    Checks the ID mapping stored with the market index, then IDs learned from
+    earlier Exchange lookups.
+    """
+    if os.path.exists(rs3_index.CACHE_FILE):
+        match = rs3_index.get_index().ids.get(normalize(name))
+        if match:
+            return match
+
+    key = _key(resolve(name))
+    with _lock:
+        _load()
+        record = _cache.get(key)
+    if record and record["data"].get("item_id"):
+        return record["data"]["item_id"], record["data"]["name"]
+    return None
+
+
+def get_item(name: str, max_age: float = ITEM_TTL) -> dict:
+    """Returns Exchange data for an item, fetching only when the cached copy is older than max_age.
+
+    Concurrent calls for the same item share one request. Raises LookupFailed
+    when the page cannot be fetched, and keeps raising it without a request
+    until that failure's backoff has run out.
+    """
+    title = resolve(name)
+    key = _key(title)
+
+    with _lock:
+        _load()
+        record = _cache.get(key)
+        if record and time.time() - record["fetched"] < max_age:
+            metrics.count("cache.items.hit")
+            return dict(record["data"])
+
+        failed = _failures.get(key)
+        if failed and time.time() < failed["retry_at"]:
+            metrics.count("cache.items.negative_hit")
+            raise LookupFailed(failed["error"], missing=failed["missing"], cached=True)
+
+        future = _inflight.get(key)
+        owner = future is None
+        metrics.count("cache.items.miss" if owner else "cache.items.coalesced")
+        if owner:
+            future = _inflight[key] = Future()
+
+    if not owner:
+        return dict(future.result())
+
+    try:
+        data = get_exchange_info(title)
+    except Exception as e:
+        error = LookupFailed(str(e), missing=isinstance(e, ItemNotFound))
+        future.set_exception(error)
+        with _lock:
+            _record_failure(key, e)
+            _schedule_save()
+        raise error from e
+    else:
+        future.set_result(data)
+        with _lock:
+            _cache[key] = {"fetched": time.time(), "data": data}
+            if data.get("item_id"):
+                _ids[data["item_id"]] = key
+            _failures.pop(key, None)
+            _schedule_save()
+        return dict(data)
+    finally:
+        # Callers waiting on this lookup must never be left blocked, whatever the owner hit on the way out.
+        if not future.done():
+            future.set_exception(LookupFailed(f"Lookup of '{title}' did not complete"))
+        with _lock:
+            _inflight.pop(key, None)
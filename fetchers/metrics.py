@@ -0,0 +1,147 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Optional
+
+PROMETHEUS_PREFIX = "market_watch"
+
+_enabled = False
+_lock = threading.Lock()
+_spans = {}   # name -> [calls, total seconds, max seconds]
+_counts = {}  # name -> count
+_NOOP = nullcontext()
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        with _lock:
+            totals = _spans.get(self.name)
+            if totals is None:
+                _spans[self.name] = [1, elapsed, elapsed]
+            else:
+                totals[0] += 1
+                totals[1] += elapsed
+                totals[2] = max(totals[2], elapsed)
+        return False
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def span(name: str):
+    """Times a block under name; a shared no-op context manager while metrics are disabled"""
+    return _Span(name) if _enabled else _NOOP
+
+
+def timed(name: str):
+    """Decorator form of span() for functions that are a hot path as a whole"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name: str, n: int = 1):
+    """Adds n to a counter such as a cache hit or miss; does nothing while metrics are disabled"""
+    if _enabled:
+        with _lock:
+            _counts[name] = _counts.get(name, 0) + n
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counts.clear()
+
+
+def snapshot() -> dict:
+    """Returns {"spans": {name: {calls, total_ms, max_ms}}, "counts": {name: n}}"""
+    with _lock:
+        spans = {
+            name: {"calls": calls, "total_ms": total * 1000, "max_ms": longest * 1000}
+            for name, (calls, total, longest) in _spans.items()
+        }
+        return {"spans": spans, "counts": dict(_counts)}
+
+
+def to_prometheus(data: dict) -> str:
+    """Renders a snapshot() in the Prometheus text exposition format"""
+    lines = [
+        f"# TYPE {PROMETHEUS_PREFIX}_span_seconds_total counter",
+        *(f'{PROMETHEUS_PREFIX}_span_seconds_total{{span="{name}"}} {span["total_ms"] / 1000:.6f}'
+          for name, span in sorted(data["spans"].items())),
+        f"# TYPE {PROMETHEUS_PREFIX}_span_calls_total counter",
+        *(f'{PROMETHEUS_PREFIX}_span_calls_total{{span="{name}"}} {span["calls"]}'
+          for name, span in sorted(data["spans"].items())),
+        f"# TYPE {PROMETHEUS_PREFIX}_events_total counter",
+        *(f'{PROMETHEUS_PREFIX}_events_total{{event="{name}"}} {n}' for name, n in sorted(data["counts"].items())),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def dump(path: str, extra_counts: Optional[dict] = None):
+    """Writes the current metrics to path: Prometheus text for .prom/.txt, JSON otherwise"""
+    data = snapshot()
+    data["counts"].update(extra_counts or {})
+    data["timestamp"] = int(time.time())
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if os.path.splitext(path)[1].lower() in (".prom", ".txt"):
+            f.write(to_prometheus(data))
+        else:
+            json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def report(console, title: str, elapsed: float):
+    """Prints a per-span breakdown of everything recorded since the last reset()"""
+    from rich.table import Table
+
+    data = snapshot()
+    table = Table(title=f"Profile: {title} ({elapsed * 1000:.0f} ms wall)",
+                  caption="Spans on worker threads overlap, so their totals can exceed the wall time.")
+    table.add_column("Span", style="bold")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total ms", justify="right", style="yellow")
+    table.add_column("Mean ms", justify="right")
+    table.add_column("Max ms", justify="right")
+    table.add_column("% of wall", justify="right")
+
+    for name, span in sorted(data["spans"].items(), key=lambda item: -item[1]["total_ms"]):
+        table.add_row(
+            name,
+            str(span["calls"]),
+            f"{span['total_ms']:.1f}",
+            f"{span['total_ms'] / span['calls']:.2f}",
+            f"{span['max_ms']:.1f}",
+            f"{span['total_ms'] / (elapsed * 10):.0f}%" if elapsed else "-",
+        )
+    console.print(table)
+
+    if data["counts"]:
+        console.print("  ".join(f"{name}={n}" for name, n in sorted(data["counts"].items())), style="dim")
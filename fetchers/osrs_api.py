@@ -1,29 +1,77 @@
-import requests
-from typing import Optional
+import threading
+import time
+from typing import Iterable, Optional
+from fetchers import metrics, transport
 
 BASE_URL = "https://prices.runescape.wiki/api/v1/osrs"
 HEADERS = {
     "User-Agent": "RS3-Market-Watcher/1.0 (by S3venScars)"
 }
+LATEST_TTL = 60  # seconds a bulk /latest response answers per-item lookups
+LATEST_RETRY = 15  # seconds after a failed /latest request before trying again; the stale payload is served meanwhile
+TIMESTEPS = {"5m": 300, "1h": 3600, "6h": 6 * 3600, "24h": 86400}  # /timeseries steps; each returns up to 365 points
+
+_latest_cache = {"timestamp": 0.0, "failed": 0.0, "data": {}}
+_latest_lock = threading.Lock()
+
+def fetch_all_latest() -> dict:
+    """Returns the cached bulk /latest payload, refetching it once it is older than LATEST_TTL.
+
+    After a failed request the previous payload is returned for LATEST_RETRY
+    seconds, so callers do not queue behind a fresh set of retries each time.
+    """
+    with _latest_lock:
+        now = time.time()
+        if now - _latest_cache["timestamp"] < LATEST_TTL or now - _latest_cache["failed"] < LATEST_RETRY:
+            metrics.count("cache.latest.hit")
+            return _latest_cache["data"]
+        metrics.count("cache.latest.miss")
+
+        url = f"{BASE_URL}/latest"
+        try:
+            res = transport.get(url, headers=HEADERS)
+            res.raise_for_status()
+            with metrics.span("parse.json"):
+                data = res.json()["data"]
+        except Exception as e:
+            print(f"Error fetching latest prices: {e}")
+            _latest_cache["failed"] = time.time()
+            return _latest_cache["data"]
+
+        _latest_cache["data"] = data
+        _latest_cache["timestamp"] = time.time()
+        return data
+
+def fetch_latest_many(item_ids: Iterable[int]) -> dict:
+    """Returns a dictionary of item_id -> latest price data from a single /latest call"""
+    data = fetch_all_latest()
+    return {item_id: data[str(item_id)] for item_id in item_ids if str(item_id) in data}
 
 def fetch_latest(item_id: int) -> Optional[dict]:
-    url = f"{BASE_URL}/latest?id={item_id}"
-    try:
-        res = requests.get(url, headers=HEADERS)
-        res.raise_for_status()
-        return res.json()["data"].get(str(item_id), None)
-    except Exception as e:
-        print(f"Error fetching item {item_id}: {e}")
-        return None
+    return fetch_latest_many([item_id]).get(item_id)
 
 def fetch_mapping() -> dict:
     """Returns a dictionary of item_id -> item_name"""
     url = f"{BASE_URL}/mapping"
     try:
-        res = requests.get(url, headers=HEADERS)
+        res = transport.get(url, headers=HEADERS)
         res.raise_for_status()
-        data = res.json()
+        with metrics.span("parse.json"):
+            data = res.json()
         return {entry["id"]: entry for entry in data}
     except Exception as e:
         print(f"Error fetching item mapping: {e}")
         return {}
+
+def fetch_timeseries(item_id: int, timestep: str = "6h") -> list:
+    """Returns up to 365 averaged price points for one item, oldest first.
+
+    Each point has timestamp, avgHighPrice, avgLowPrice, highPriceVolume and
+    lowPriceVolume. Unlike the other fetchers this raises on a failed request,
+    so callers can tell an item with no trades from one that was not fetched.
+    """
+    url = f"{BASE_URL}/timeseries"
+    res = transport.get(url, headers=HEADERS, params={"id": item_id, "timestep": timestep})
+    res.raise_for_status()
+    with metrics.span("parse.json"):
+        return res.json()["data"]
@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from rich.console import Console
+
+from fetchers import metrics, scheduler
+from fetchers.osrs_api import fetch_mapping
+from fetchers.rs3_index import resource_path
+from fetchers.search_index import SearchIndex, normalize
+
+CACHE_FILE = resource_path("data/osrs_mapping.json")
+CACHE_EXPIRY = 24 * 3600  # item metadata rarely changes
+
+FIELDS = ("id", "name", "members", "value", "lowalch", "highalch", "limit")
+
+console = Console()
+
+
+class MappingEntry:
+    __slots__ = FIELDS
+
+    def __init__(self, *values):
+        for field, value in zip(FIELDS, values):
+            setattr(self, field, value)
+
+    @classmethod
+    def from_api(cls, entry):
+        return cls(*(entry.get(field) for field in FIELDS))
+
+    def to_row(self):
+        return [getattr(self, field) for field in FIELDS]
+
+
+class OsrsMapping:
+    """Item ID -> metadata with a normalized-name index and a search index built on demand"""
+
+    def __init__(self, entries, timestamp):
+        self.timestamp = timestamp
+        self._by_id = {entry.id: entry for entry in entries}
+        self._by_name = {normalize(entry.name): entry for entry in entries}
+        self._search_index = None
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, item_id):
+        return item_id in self._by_id
+
+    def get(self, item_id: int) -> Optional[MappingEntry]:
+        return self._by_id.get(item_id)
+
+    def by_name(self, name: str) -> Optional[MappingEntry]:
+        return self._by_name.get(normalize(name))
+
+    def values(self):
+        return self._by_id.values()
+
+    @property
+    def expired(self):
+        return time.time() - self.timestamp > CACHE_EXPIRY
+
+    @property
+    def search_index(self):
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.values(), key=lambda entry: entry.name)
+        return self._search_index
+
+
+@metrics.timed("cache.mapping.read")
+def _load_cache() -> Optional[OsrsMapping]:
+    if not os.path.exists(CACHE_FILE):
+        return None
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("fields") != list(FIELDS):
+        return None
+    return OsrsMapping([MappingEntry(*row) for row in data["rows"]], data.get("timestamp", 0))
+
+
+def _download() -> Optional[OsrsMapping]:
+    raw = fetch_mapping()
+    if not raw:
+        return None
+
+    entries = [MappingEntry.from_api(entry) for entry in raw.values()]
+    timestamp = time.time()
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    tmp_path = CACHE_FILE + ".tmp"
+    with metrics.span("cache.mapping.write"), open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": timestamp, "fields": list(FIELDS), "rows": [entry.to_row() for entry in entries]}, f)
+    os.replace(tmp_path, CACHE_FILE)
+    return OsrsMapping(entries, timestamp)
+
+
+_lock = threading.Lock()
+_state = {"mapping": None, "refreshing": False}
+
+
+def _background_refresh():
+    try:
+        with scheduler.priority(scheduler.BACKGROUND):
+            mapping = _download()
+        if mapping:
+            _state["mapping"] = mapping
+    finally:
+        _state["refreshing"] = False
+
+
+def get_mapping() -> OsrsMapping:
+    """Returns the OSRS item mapping, loading it on first use.
+
+    A cached copy on disk is served immediately; once it is older than
+    CACHE_EXPIRY it is refreshed by a background thread. Only a missing cache
+    blocks on the network.
+    """
+    with _lock:
+        mapping = _state["mapping"]
+        if mapping is None:
+            mapping = _load_cache()
+            if mapping is None:
+                console.print("[cyan]Downloading OSRS item mapping...[/cyan]")
+                mapping = _download() or OsrsMapping([], 0)
+            _state["mapping"] = mapping
+
+        if mapping.expired and not _state["refreshing"]:
+            _state["refreshing"] = True
+            threading.Thread(target=_background_refresh, daemon=True).start()
+
+        return mapping
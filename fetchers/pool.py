@@ -0,0 +1,51 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+MAX_WORKERS = 8
+PER_HOST_LIMIT = 4  # politeness cap: concurrent requests to any single host
+HOST_LIMITS = {}    # host -> cap for hosts that allow more (or fewer) than PER_HOST_LIMIT
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def _slot(host: str) -> threading.BoundedSemaphore:
+    # One semaphore per host, shared by every fetch_all() call, so the index,
+    # watchlist and backfill batches respect the same cap together.
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(HOST_LIMITS.get(host, PER_HOST_LIMIT))
+        return _host_slots[host]
+
+
+def fetch_all(items, fetch, host="", max_workers=MAX_WORKERS):
+    """Runs fetch(item) for every item concurrently, yielding (item, result, error) as each completes.
+
+    `host` is either a fixed host name or a callable mapping an item to its host.
+    """
+    items = list(items)
+    if not items:
+        return
+
+    def run(item):
+        name = host(item) if callable(host) else host
+        with _slot(name):
+            return fetch(item)
+
+    workers = max(1, min(max_workers, len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Each task runs in a copy of the caller's context so settings such as the
+        # request priority follow the work onto the worker threads.
+        futures = {executor.submit(contextvars.copy_context().run, run, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
@@ -1,12 +1,16 @@
 import sys
 import os
 import json
+import threading
 import time
-import requests
-from bs4 import BeautifulSoup
+from types import MappingProxyType
 from rich.console import Console
+from fetchers import index_store, metrics, rs3_api, scheduler, transport
+from fetchers.pool import fetch_all, host_of
+from fetchers.search_index import SearchIndex, normalize
 
 console = Console()
+_quiet_console = Console(quiet=True)
 
 def resource_path(relative_path):
     if hasattr(sys, '_MEIPASS'):
@@ -14,9 +18,10 @@ def resource_path(relative_path):
     return os.path.join(os.path.abspath("."), relative_path)
 
 
-CACHE_FILE = resource_path("data/rs3_index.json")
-os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+CACHE_FILE = resource_path("data/rs3_index.bin")
+LEGACY_CACHE_FILES = [resource_path("data/rs3_index.json"), resource_path("data/rs3_search_cache.json")]
 CACHE_EXPIRY = 4 * 3600  # 4 hours
+MAPPING_EXPIRY = 24 * 3600  # the name -> ID mapping only changes when items are added to the game
 
 INDEX_SKILLS = [
     "Archaeology", "Construction", "Construction_flatpacks", "Cooking", "Crafting",
@@ -31,83 +36,252 @@ HEADERS = {
 }
 
 
-def fetch_market_index():
-    all_items = []
+@metrics.timed("parse.index_page")
+def _parse_skill_page(skill, html, log=console):
+    from bs4 import BeautifulSoup
 
-    for skill in INDEX_SKILLS:
-        url = BASE_URL + skill
-        console.print(f"Fetching index from: {skill}", style="blue")
+    soup = BeautifulSoup(html, "html.parser")
+    items = []
 
-        try:
-            resp = requests.get(url, headers=HEADERS)
-            if resp.status_code != 200:
-                console.print(f"[red]Failed to fetch {skill}: HTTP {resp.status_code}[/red]")
-                continue
+    tables = soup.select("table.wikitable.sortable")
+    log.print(f"Found {len(tables)} table(s) on {skill}", style="cyan")
 
-            soup = BeautifulSoup(resp.text, "html.parser")
+    if not tables:
+        log.print(f"[yellow]Warning: No valid item table found on {skill}[/yellow]")
+        return items
 
-            tables = soup.select("table.wikitable.sortable")
-            console.print(f"Found {len(tables)} table(s) on {skill}", style="cyan")
+    for table in tables:
+        rows = table.find_all("tr")[1:]  # Skip header
 
-            if not tables:
-                console.print(f"[yellow]Warning: No valid item table found on {skill}[/yellow]")
+        for row in rows:
+            cols = row.find_all("td")
+            if len(cols) < 2:
                 continue
 
-            for table in tables:
-                rows = table.find_all("tr")[1:]  # Skip header
+            link_tag = cols[1].find("a")
+            if not link_tag:
+                continue
 
-                for row in rows:
-                    cols = row.find_all("td")
-                    if len(cols) < 2:
-                        continue
+            name = link_tag.get("title", "").strip()
+            url = "https://runescape.wiki" + link_tag.get("href", "").strip()
 
-                    link_tag = cols[1].find("a")
-                    if not link_tag:
-                        continue
+            price = cols[2].text.strip().replace(",", "") if len(cols) >= 3 else None
+            price = int(price) if price and price.isdigit() else None
 
-                    name = link_tag.get("title", "").strip()
-                    url = "https://runescape.wiki" + link_tag.get("href", "").strip()
+            items.append({
+                "name": name,
+                "url": url,
+                "price": price
+            })
 
-                    price = cols[2].text.strip().replace(",", "") if len(cols) >= 3 else None
-                    price = int(price) if price and price.isdigit() else None
+    return items
 
-                    all_items.append({
-                        "name": name,
-                        "url": url,
-                        "price": price
-                    })
 
-        except Exception as e:
-            console.print(f"[red]Error processing {skill}: {e}[/red]")
+def _fetch_skill_page(skill, previous=None, log=console):
+    """Returns a fresh page shard for skill, or None when the wiki reports it unchanged"""
+    headers = dict(HEADERS)
+    if previous:
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
 
-    return all_items
+    resp = transport.get(BASE_URL + skill, headers=headers)
+    if resp.status_code == 304 and previous:
+        return None
+    if resp.status_code != 200:
+        raise ValueError(f"HTTP {resp.status_code}")
 
+    return {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "items": _parse_skill_page(skill, resp.text, log),
+    }
 
-def save_index(items):
-    with open(CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump({
-            "timestamp": time.time(),
-            "items": items
-        }, f, indent=2)
 
+def fetch_index_pages(previous=None, log=console):
+    """Fetches every skill page concurrently, re-parsing only pages that changed since `previous`"""
+    previous = previous or {}
+    pages = {}
+
+    # Index pages are bulk background work: any interactive lookup to the wiki goes first.
+    with scheduler.priority(scheduler.BACKGROUND):
+        results = fetch_all(INDEX_SKILLS, lambda skill: _fetch_skill_page(skill, previous.get(skill), log),
+                            host=host_of(BASE_URL))
+
+        for skill, page, error in results:
+            if error:
+                log.print(f"[red]Failed to fetch {skill}: {error}[/red]")
+                page = previous.get(skill)
+            elif page is None:
+                log.print(f"{skill} unchanged", style="dim")
+                page = previous[skill]
+            else:
+                log.print(f"Fetched index from: {skill}", style="blue")
+
+            if page:
+                pages[skill] = page
+
+    return pages
+
+
+def fetch_market_index():
+    pages = fetch_index_pages()
+    return [item for skill in INDEX_SKILLS for item in pages.get(skill, {}).get("items", [])]
 
-def load_cached_index(force_refresh=False):
-    if not os.path.exists(CACHE_FILE) or force_refresh:
-        console.print("[cyan]Refreshing index: no cache found or forced refresh...[/cyan]")
-        items = fetch_market_index()
-        save_index(items)
-        return items
 
-    with open(CACHE_FILE, "r", encoding="utf-8") as f:
+def save_index(pages, ids=None, ids_timestamp=None):
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    index_store.write(CACHE_FILE, pages, time.time(), ids, ids_timestamp)
+
+
+def _migrate_legacy_cache():
+    """Converts the old pretty-printed JSON cache into the compact store and drops the JSON copies"""
+    legacy = LEGACY_CACHE_FILES[0]
+    if not os.path.exists(legacy):
+        return
+
+    with open(legacy, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    timestamp = data.get("timestamp", 0)
-    age = time.time() - timestamp
+    # Flat caches predate per-skill shards; keep their rows under one key until the next refresh.
+    pages = data.get("pages") or {"legacy": {"items": data.get("items", [])}}
+    index_store.write(CACHE_FILE, pages, data.get("timestamp", 0))
+
+    for path in LEGACY_CACHE_FILES:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _load_store():
+    if not os.path.exists(CACHE_FILE):
+        _migrate_legacy_cache()
+    if not os.path.exists(CACHE_FILE):
+        return None
+    return index_store.load(CACHE_FILE)
+
+
+def fetch_item_ids():
+    """Returns {item name: item ID} from the prices API mapping, or {} if it is unavailable"""
+    return {entry["name"]: entry["id"] for entry in rs3_api.fetch_mapping().values()}
+
+
+def _item_ids(previous=None):
+    """Returns (ids, downloaded at), reusing the previous store's mapping while it is younger than MAPPING_EXPIRY"""
+    if previous and previous.ids and time.time() - previous.ids_timestamp < MAPPING_EXPIRY:
+        return previous.ids, previous.ids_timestamp
+    ids = fetch_item_ids()
+    if ids:
+        return ids, time.time()
+    # Keep the old mapping and its age, so the next refresh tries the download again.
+    return (previous.ids, previous.ids_timestamp) if previous else ({}, 0)
+
+
+def _refresh(previous=None, log=console):
+    """Rebuilds the index from the wiki, reusing unchanged shards and IDs from the `previous` store"""
+    old_pages = previous.pages() if previous else None
+    pages = fetch_index_pages(old_pages, log)
+    if not pages and old_pages:
+        pages = old_pages  # every page failed; keep serving the old shards
+    ids, ids_timestamp = _item_ids(previous)
+    save_index(pages, ids, ids_timestamp)
+    return index_store.load(CACHE_FILE)
+
+
+class MarketIndex:
+    """Immutable snapshot of the market index shared by every caller in the process"""
+
+    __slots__ = ("items", "timestamp", "_store", "_search_index", "_ids", "_names")
+
+    def __init__(self, store):
+        self.items = tuple(MappingProxyType(item) for item in store.items())
+        self.timestamp = store.timestamp
+        self._store = store
+        self._search_index = None
+        self._ids = None
+        self._names = None
+
+    @property
+    def expired(self):
+        return time.time() - self.timestamp > CACHE_EXPIRY
+
+    @property
+    def ids(self):
+        """Read-only {normalized name: (item ID, name)} built from the stored mapping on first use"""
+        if self._ids is None:
+            self._ids = MappingProxyType(
+                {normalize(name): (item_id, name) for name, item_id in self._store.ids.items()}
+            )
+        return self._ids
+
+    @property
+    def names(self):
+        """Read-only {item ID: name}, the reverse of ids"""
+        if self._names is None:
+            self._names = MappingProxyType({item_id: name for name, item_id in self._store.ids.items()})
+        return self._names
+
+    @property
+    def search_index(self):
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.items)
+        return self._search_index
+
+
+_index_lock = threading.Lock()
+_index = {"mtime": None, "store": None, "snapshot": None, "refreshing": False}
+
+
+def _install(store):
+    _index["store"] = store
+    _index["snapshot"] = MarketIndex(store)
+    _index["mtime"] = os.path.getmtime(CACHE_FILE)
+    return _index["snapshot"]
+
+
+def _background_refresh(previous):
+    try:
+        with scheduler.priority(scheduler.BACKGROUND):
+            store = _refresh(previous, log=_quiet_console)
+        with _index_lock:
+            _install(store)
+    except Exception as e:
+        console.print(f"[red]Background index refresh failed: {e}[/red]")
+    finally:
+        _index["refreshing"] = False
+
+
+def get_index(force_refresh=False):
+    """Returns the shared MarketIndex, reloading it only when the cache file changes.
+
+    An expired index is still served while a background thread rebuilds it;
+    only a missing cache or an explicit force_refresh blocks on the network.
+    """
+    with _index_lock:
+        mtime = os.path.getmtime(CACHE_FILE) if os.path.exists(CACHE_FILE) else None
+        snapshot = _index["snapshot"]
+
+        if force_refresh or snapshot is None or mtime != _index["mtime"]:
+            metrics.count("cache.index.reload")
+            store = _load_store()
+            if store is None or force_refresh:
+                console.print("[cyan]Refreshing index: no cache found or forced refresh...[/cyan]")
+                store = _refresh(store)
+            snapshot = _install(store)
+        else:
+            metrics.count("cache.index.hit")
+
+        if snapshot.expired and not _index["refreshing"]:
+            console.print("[cyan]Index is older than 4 hours; refreshing in the background...[/cyan]")
+            _index["refreshing"] = True
+            threading.Thread(target=_background_refresh, args=(_index["store"],), daemon=True).start()
+
+        return snapshot
+
+
+def load_cached_index(force_refresh=False):
+    return get_index(force_refresh).items
 
-    if age > CACHE_EXPIRY:
-        console.print("[cyan]Refreshing index: data is older than 4 hours...[/cyan]")
-        items = fetch_market_index()
-        save_index(items)
-        return items
 
-    return data.get("items", [])
+def load_search_index(force_refresh=False):
+    return get_index(force_refresh).search_index
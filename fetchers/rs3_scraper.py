@@ -1,42 +1,89 @@
-import requests
-from bs4 import BeautifulSoup
+import time
 from datetime import datetime
+from functools import lru_cache
+from urllib.parse import quote
+from fetchers import metrics, transport
 
 HEADERS = {
     "User-Agent": "RS3-Market-Watcher/1.0 (by YourName)"
 }
 
 BASE_URL = "https://runescape.wiki/w/Exchange:"
+UPDATED_FORMAT = "%Y-%m-%d %H:%M:%S"  # local time the page was fetched, stored as last_updated
+
+
+class ItemNotFound(ValueError):
+    """The wiki has no Exchange page under this name (HTTP 404), as opposed to a failed fetch"""
+
+FIELD_IDS = {
+    "ge_price": "GEPrice",
+    "high_alch": "exchange-highalch",
+    "low_alch": "exchange-lowalch",
+    "store_price": "exchange-value",
+    "buy_limit": "exchange-limit",
+    "volume": "GEVolume",
+    "item_id": "exchange-itemid",
+}
+
+
+@lru_cache(maxsize=None)
+def _field_xpath():
+    # One XPath pass over the tree instead of a full-tree search per field.
+    # lxml is only loaded once a page is actually scraped.
+    from lxml import etree
+
+    return etree.XPath("//*[" + " or ".join(f'@id="{element_id}"' for element_id in FIELD_IDS.values()) + "]")
+
+
+def _to_int(val):
+    return int(val) if val and val.isdigit() else None
+
+
+@metrics.timed("parse.exchange")
+def parse_exchange_page(page_html, item_name: str, url: str) -> dict:
+    """Extracts the Exchange infobox fields from a page's HTML"""
+    from lxml import html
+
+    tree = html.fromstring(page_html)
+    found = {}
+    for element in _field_xpath()(tree):
+        element_id = element.get("id")
+        if element_id not in found:
+            found[element_id] = element.text_content().strip().replace(",", "")
+
+    info = {"name": item_name}
+    for field, element_id in FIELD_IDS.items():
+        info[field] = _to_int(found.get(element_id))
+    info["last_updated"] = datetime.now().strftime(UPDATED_FORMAT)
+    info["url"] = url
+    return info
+
+
+def fetched_at(info: dict) -> int:
+    """Returns when Exchange data was fetched as unix seconds, so a cached copy keeps its original time"""
+    try:
+        return int(datetime.strptime(info["last_updated"], UPDATED_FORMAT).timestamp())
+    except (KeyError, TypeError, ValueError):
+        return int(time.time())
+
+
+def canonical_title(name: str) -> str:
+    """Normalizes a name the way MediaWiki does: underscores as spaces, single-spaced, first letter upper-case"""
+    title = " ".join(name.replace("_", " ").split())
+    return title[:1].upper() + title[1:]
+
+
+def exchange_url(name: str) -> str:
+    return BASE_URL + quote(canonical_title(name).replace(" ", "_"), safe="()")
 
 
 def get_exchange_info(item_name: str) -> dict:
-    slug = item_name.strip().lower().replace(" ", "_").replace("+", "%2B")
-    url = f"https://runescape.wiki/w/Exchange:{slug}"
-    response = requests.get(url, headers=HEADERS)
+    url = exchange_url(item_name)
+    response = transport.get(url, headers=HEADERS)
 
+    if response.status_code == 404:
+        raise ItemNotFound(f"No exchange page for '{item_name}'")
     if response.status_code != 200:
         raise ValueError(f"Could not fetch exchange page for '{item_name}'")
 
-    soup = BeautifulSoup(response.text, "lxml")
-
-    def get_by_id(element_id):
-        tag = soup.find(id=element_id)
-        if tag:
-            return tag.get_text(strip=True).replace(",", "")
-        return None
-
-    def to_int(val):
-        return int(val) if val and val.isdigit() else None
-
-    return {
-        "name": item_name,
-        "ge_price": to_int(get_by_id("GEPrice")),
-        "high_alch": to_int(get_by_id("exchange-highalch")),
-        "low_alch": to_int(get_by_id("exchange-lowalch")),
-        "store_price": to_int(get_by_id("exchange-value")),
-        "buy_limit": to_int(get_by_id("exchange-limit")),
-        "volume": to_int(get_by_id("GEVolume")),
-        "item_id": to_int(get_by_id("exchange-itemid")),
-        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "url": url,
-    }
+    return parse_exchange_page(response.content, item_name, url)
@@ -0,0 +1,161 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fetchers import metrics
+
+# Request priorities; lower goes first when several callers wait on the same host.
+INTERACTIVE = 0  # the user is waiting on this request
+NORMAL = 1       # refreshes the user asked for but is not blocked on
+BACKGROUND = 2   # index rebuilds, daemon polls, mapping refreshes
+
+INITIAL_RATE = 8.0    # requests per second granted to a host we know nothing about
+BURST = 8             # requests that may go out back to back after an idle spell
+MIN_RATE = 0.5
+RATE_INCREASE = 0.25  # requests per second added per successful response...
+RATE_DECREASE = 0.5   # ...and the factor applied once per 429 episode (AIMD, like TCP congestion control)
+UNTHROTTLE_AFTER = 10 * 60  # seconds without a 429 (counted from the first request) before a host's cap is lifted
+RATE_WINDOW = 1.0     # seconds of grants counted to estimate the rate the server just refused
+
+_priority = ContextVar("request_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level: int):
+    """Runs the block's requests, including those on fetch_all worker threads, at the given priority"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class HostBucket:
+    """Per-host token bucket whose rate adapts to the server's 429 responses.
+
+    Every host starts at INITIAL_RATE with BURST tokens. The rate grows a
+    little with every success and halves on each 429 episode, which also
+    pauses the host. Once a host has gone UNTHROTTLE_AFTER seconds without a
+    429 its cap is lifted; a later 429 brings it back at half the rate the
+    host was just getting. Waiting callers are served strictly by
+    (priority, arrival order), so an interactive lookup overtakes a queue of
+    background index requests.
+    """
+
+    def __init__(self, burst=BURST):
+        self.rate = INITIAL_RATE  # requests per second; None once the cap has been lifted
+        self.burst = burst
+        self.tokens = float(burst)
+        self.paused_until = 0.0
+        self.last_throttled = time.monotonic()  # the cap is only lifted after UNTHROTTLE_AFTER of clean responses
+        self.throttled = 0
+        self.granted = 0
+        self._recent = deque()  # grant times within RATE_WINDOW, once the cap is lifted
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._arrivals = itertools.count()
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _grant(self, now):
+        self.granted += 1
+        if self.rate is None:
+            self._recent.append(now)
+            while self._recent[0] <= now - RATE_WINDOW:
+                self._recent.popleft()
+        else:
+            self.tokens -= 1
+
+    def acquire(self, level: int = INTERACTIVE):
+        """Blocks until this caller may send one request"""
+        with self._cond:
+            ticket = (level, next(self._arrivals))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] != ticket:
+                        self._cond.wait()
+                        continue
+                    if now >= self.paused_until and (self.rate is None or self.tokens >= 1):
+                        self._grant(now)
+                        return
+                    wait = self.paused_until - now
+                    if self.rate is not None:
+                        wait = max(wait, (1 - self.tokens) / self.rate)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def record(self, status: int, retry_after=None):
+        """Feeds a response status back: 429 halves the rate and pauses the host, success raises or lifts the cap"""
+        with self._cond:
+            now = time.monotonic()
+            if status == 429:
+                self.throttled += 1
+                self.last_throttled = now
+                # Requests already in flight come back 429 together; that is one episode, not several.
+                if now >= self.paused_until:
+                    if self.rate is None:
+                        self.rate = max(MIN_RATE, len(self._recent) / RATE_WINDOW * RATE_DECREASE)
+                        self._recent.clear()
+                    else:
+                        self.rate = max(MIN_RATE, self.rate * RATE_DECREASE)
+                self.tokens = 0.0
+                pause = retry_after if retry_after is not None else 1 / self.rate
+                self.paused_until = max(self.paused_until, now + pause)
+            elif status < 500 and self.rate is not None:
+                if now - self.last_throttled > UNTHROTTLE_AFTER:
+                    self.rate = None
+                else:
+                    self.rate += RATE_INCREASE
+            self._cond.notify_all()
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket(host: str) -> HostBucket:
+    with _buckets_lock:
+        if host not in _buckets:
+            _buckets[host] = HostBucket()
+        return _buckets[host]
+
+
+def acquire(host: str):
+    """Waits for host's budget at the caller's current priority"""
+    host_bucket = bucket(host)
+    with metrics.span("http.wait"):
+        host_bucket.acquire(current_priority())
+
+
+def record(host: str, status: int, retry_after=None):
+    if status == 429:
+        metrics.count("http.throttled")
+    bucket(host).record(status, retry_after)
+
+
+def stats() -> dict:
+    """Returns {host: {rate, granted, throttled}} for every host contacted so far; rate is None once uncapped"""
+    with _buckets_lock:
+        buckets = dict(_buckets)
+    return {
+        host: {"rate": None if b.rate is None else round(b.rate, 2), "granted": b.granted, "throttled": b.throttled}
+        for host, b in buckets.items()
+    }
@@ -0,0 +1,107 @@
+from collections import defaultdict
+from typing import Optional
+
+FUZZY_THRESHOLD = 0.45  # minimum trigram Dice similarity for a typo-tolerant match
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().replace("_", " ").split())
+
+
+def _grams(text: str, n: int) -> set:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _padded_trigrams(text: str) -> set:
+    return _grams(f"  {text} ", 3)
+
+
+class SearchIndex:
+    """N-gram index over item names, built once and queried per keystroke.
+
+    Entries are de-duplicated by normalized name (first one wins). Queries
+    match by substring, rank exact > prefix > word prefix > substring, and
+    fall back to trigram similarity when nothing contains the term.
+    """
+
+    def __init__(self, entries, key=lambda entry: entry["name"]):
+        self._entries = []
+        self._names = []
+        self._trigram_counts = []
+        self._postings = defaultdict(set)
+        self._by_name = {}
+
+        for entry in entries:
+            name = normalize(key(entry))
+            if not name or name in self._by_name:
+                continue
+
+            doc = len(self._entries)
+            self._by_name[name] = doc
+            self._entries.append(entry)
+            self._names.append(name)
+
+            # 1- and 2-grams answer short queries; padded trigrams serve both
+            # substring candidates and fuzzy scoring.
+            trigrams = _padded_trigrams(name)
+            self._trigram_counts.append(len(trigrams))
+            for gram in _grams(name, 1) | _grams(name, 2) | trigrams:
+                self._postings[gram].add(doc)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, name: str):
+        """Returns the entry whose name matches exactly (case-insensitive), or None"""
+        doc = self._by_name.get(normalize(name))
+        return self._entries[doc] if doc is not None else None
+
+    def _candidates(self, term: str) -> set:
+        grams = _grams(term, min(3, len(term)))
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        if not postings:
+            return set()
+        return postings[0].intersection(*postings[1:])
+
+    def _rank(self, doc: int, term: str):
+        name = self._names[doc]
+        if name == term:
+            tier = 0
+        elif name.startswith(term):
+            tier = 1
+        elif f" {term}" in name:
+            tier = 2
+        else:
+            tier = 3
+        return tier, len(name), name
+
+    def _fuzzy(self, term: str) -> list:
+        grams = _padded_trigrams(term)
+        shared = defaultdict(int)
+        for gram in grams:
+            for doc in self._postings.get(gram, ()):
+                shared[doc] += 1
+
+        scored = []
+        for doc, count in shared.items():
+            score = 2 * count / (len(grams) + self._trigram_counts[doc])
+            if score >= FUZZY_THRESHOLD:
+                scored.append((-score, self._names[doc], doc))
+        scored.sort()
+        return [doc for _, _, doc in scored]
+
+    def search(self, term: str, fuzzy: bool = True, limit: Optional[int] = None) -> list:
+        """Returns matching entries ranked best first"""
+        term = normalize(term)
+        if not term:
+            return []
+
+        docs = [doc for doc in self._candidates(term) if term in self._names[doc]]
+        if docs:
+            docs.sort(key=lambda doc: self._rank(doc, term))
+        elif fuzzy:
+            docs = self._fuzzy(term)
+
+        if limit is not None:
+            docs = docs[:limit]
+        return [self._entries[doc] for doc in docs]
@@ -0,0 +1,131 @@
+import random
+import threading
+import time
+import weakref
+from typing import Optional
+
+from fetchers import metrics, scheduler
+from fetchers.pool import host_of
+
+POOL_CONNECTIONS = 8   # distinct hosts kept in the pool
+POOL_MAXSIZE = 32      # keep-alive connections per host; room for pooled batches plus daemon and interactive requests
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+_stats = {"requests": 0, "connections": 0, "retries": 0}
+_stats_lock = threading.Lock()
+_pool_connections = weakref.WeakKeyDictionary()
+
+
+def get_session():
+    """Returns the process-wide pooled requests.Session shared by every fetcher"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            # requests is imported on the first request so the menus start without it.
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _retry_after(resp) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter: spreads retries from concurrent workers instead of re-synchronising them.
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _count(resp):
+    # urllib3 counts connections opened per pool; any request that did not open
+    # a new one went out over a kept-alive connection.
+    pool = getattr(resp.raw, "_pool", None)
+    with _stats_lock:
+        _stats["requests"] += 1
+        if pool is None:
+            _stats["connections"] += 1
+            return
+        opened = pool.num_connections - _pool_connections.get(pool, 0)
+        _pool_connections[pool] = pool.num_connections
+        _stats["connections"] += max(0, opened)
+
+
+def get(url: str, headers: Optional[dict] = None, timeout=DEFAULT_TIMEOUT, retries: int = MAX_RETRIES, **kwargs):
+    """GETs a url over the shared session, retrying 429/5xx and connection errors with backoff.
+
+    Every attempt first waits for the host's budget in the shared scheduler, at
+    the caller's priority. Returns the last response once retries run out, so
+    callers keep checking status codes themselves.
+    """
+    import requests
+
+    session = get_session()
+    host = host_of(url)
+    attempt = 0
+
+    while True:
+        scheduler.acquire(host)
+        try:
+            with metrics.span("http.get"):
+                resp = session.get(url, headers=headers, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+            delay = _backoff(attempt)
+        else:
+            _count(resp)
+            retry_after = _retry_after(resp) if resp.status_code in RETRY_STATUSES else None
+            if retry_after is not None:
+                retry_after = min(retry_after, BACKOFF_MAX)
+            scheduler.record(host, resp.status_code, retry_after)
+            if resp.status_code not in RETRY_STATUSES or attempt >= retries:
+                return resp
+            if resp.status_code == 429:
+                delay = 0.0  # the scheduler has already paused the whole host
+            else:
+                delay = retry_after if retry_after is not None else min(BACKOFF_MAX, _backoff(attempt))
+            resp.close()
+
+        attempt += 1
+        with _stats_lock:
+            _stats["retries"] += 1
+        metrics.count("http.retry")
+        time.sleep(delay)
+
+
+def stats() -> dict:
+    """Returns request, new-connection, reuse and retry counters for the shared session"""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    snapshot["reuses"] = max(0, snapshot["requests"] - snapshot["connections"])
+    return snapshot
+
+
+def reset_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
@@ -1,22 +1,29 @@
+import argparse
+import time
+from datetime import datetime
 from rich.console import Console
 from rich.table import Table
+from rich.live import Live
 from rich.panel import Panel
-from fetchers.osrs_api import fetch_latest, fetch_mapping
+from fetchers import metrics
+from fetchers.osrs_api import fetch_latest, fetch_latest_many
+from fetchers.osrs_mapping import get_mapping
 from models.item import ItemPrice
-from storage import osrs_watchlist
+from storage import osrs_watchlist as watchlist
+from storage.price_history import open_history
 
 console = Console()
-mapping = fetch_mapping()
 
 
-def show_watchlist():
-    ids = watchlist.load_watchlist()
+def record_prices(prices):
+    open_history("osrs").record_many(
+        (item_id, max(data.get("highTime") or 0, data.get("lowTime") or 0), data.get("high"), data.get("low"), None, None)
+        for item_id, data in prices.items()
+    )
 
-    if not ids:
-        console.print("[yellow]Your watchlist is empty.[/yellow]")
-        return
 
-    table = Table(title="RS3 Market Watchlist")
+def watchlist_table(rows):
+    table = Table(title="OSRS Market Watchlist")
     table.add_column("ID", justify="center", style="cyan")
     table.add_column("Name", style="bold")
     table.add_column("High", justify="right", style="green")
@@ -24,52 +31,85 @@ def show_watchlist():
     table.add_column("Low", justify="right", style="red")
     table.add_column("Low Time", justify="center")
 
-    for item_id in ids:
-        price_data = fetch_latest(item_id)
-        entry = mapping.get(item_id)
+    for row in rows:
+        table.add_row(*row)
+    return table
 
-        if not entry or not price_data:
-            continue
 
-        item = ItemPrice(
-            item_id=item_id,
-            name=entry["name"],
-            high=price_data["high"],
-            low=price_data["low"],
-            high_time=price_data["highTime"],
-            low_time=price_data["lowTime"],
-        )
+def cached_row(item_id, name, history):
+    latest = history.latest(item_id)
+    if not latest:
+        return [str(item_id), name] + ["[dim]...[/dim]"] * 4
+
+    recorded = datetime.fromtimestamp(latest["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
+    cells = [str(latest["high"] or "-"), recorded, str(latest["low"] or "-"), recorded]
+    return [str(item_id), name] + [f"[dim]{cell}[/dim]" for cell in cells]
+
+
+def show_watchlist():
+    ids = watchlist.load_watchlist()
+
+    if not ids:
+        console.print("[yellow]Your watchlist is empty.[/yellow]")
+        return
+
+    mapping = get_mapping()
+    history = open_history("osrs")
 
-        table.add_row(*item.to_row())
+    # Show the last recorded prices (dimmed) while the live prices are fetched.
+    rows = {
+        item_id: cached_row(item_id, mapping.get(item_id).name, history)
+        for item_id in ids
+        if mapping.get(item_id)
+    }
 
-    console.print(table)
+    with Live(watchlist_table(rows.values()), console=console, vertical_overflow="visible") as live:
+        prices = fetch_latest_many(ids)
+        record_prices(prices)
+        # Write the buffered prices now rather than at exit, which closing the window skips.
+        history.flush()
+
+        for item_id in list(rows):
+            price_data = prices.get(item_id)
+
+            if not price_data:
+                continue
+
+            item = ItemPrice(
+                item_id=item_id,
+                name=mapping.get(item_id).name,
+                high=price_data["high"],
+                low=price_data["low"],
+                high_time=price_data["highTime"],
+                low_time=price_data["lowTime"],
+            )
+            rows[item_id] = item.to_row()
+
+        with metrics.span("render"):
+            live.update(watchlist_table(rows.values()), refresh=True)
 
 
 def manual_add():
     item_name = input("Enter item name to add: ").lower()
+    entry = get_mapping().by_name(item_name)
 
-    for item_id, entry in mapping.items():
-        if item_name == entry["name"].lower():
-            watchlist.add_item(item_id)
-            console.print(f"[green]Added {entry['name']} (ID {item_id}) to watchlist.[/green]")
-            return
+    if not entry:
+        console.print("[red]Item not found.[/red]")
+        return
 
-    console.print("[red]Item not found.[/red]")
+    watchlist.add_item(entry.id)
+    console.print(f"[green]Added {entry.name} (ID {entry.id}) to watchlist.[/green]")
 
 
 def search_items():
     term = input("Enter search term: ").lower()
-    results = []
-
-    for item_id, entry in mapping.items():
-        if term in entry["name"].lower():
-            results.append((item_id, entry["name"]))
+    mapping = get_mapping()
+    results = [(entry.id, entry.name) for entry in mapping.search_index.search(term)]
 
     if not results:
         console.print("[yellow]No items found.[/yellow]")
         return
 
-    results.sort(key=lambda x: x[1])  # Sort by name
     per_page = 20
     total_pages = (len(results) + per_page - 1) // per_page
     page = 0
@@ -86,7 +126,8 @@ def search_items():
         for item_id, name in page_results:
             table.add_row(str(item_id), name)
 
-        console.print(table)
+        with metrics.span("render"):
+            console.print(table)
         console.print("[dim][N]ext, [P]rev, [A]dd <id|name>, [Q]uit[/dim]")
 
         cmd = input(">> ").strip().lower()
@@ -101,15 +142,14 @@ def search_items():
                 item_id = int(arg)
                 if item_id in mapping:
                     watchlist.add_item(item_id)
-                    console.print(f"[green]Added {mapping[item_id]['name']}[/green]")
+                    console.print(f"[green]Added {mapping.get(item_id).name}[/green]")
                 else:
                     console.print("[red]Invalid ID.[/red]")
             else:
-                matches = [id for id, entry in mapping.items() if entry["name"].lower() == arg.lower()]
-                if matches:
-                    item_id = matches[0]
-                    watchlist.add_item(item_id)
-                    console.print(f"[green]Added {mapping[item_id]['name']}[/green]")
+                entry = mapping.by_name(arg)
+                if entry:
+                    watchlist.add_item(entry.id)
+                    console.print(f"[green]Added {entry.name}[/green]")
                 else:
                     console.print("[red]Name not found.[/red]")
         elif cmd == "q":
@@ -126,8 +166,7 @@ def simulate_profit():
         return
 
     item_id = int(item_id_input)
-    mapping = fetch_mapping()
-    item_entry = mapping.get(item_id)
+    item_entry = get_mapping().get(item_id)
 
     if not item_entry:
         console.print("[red]Item not found in mapping.[/red]")
@@ -138,6 +177,9 @@ def simulate_profit():
         console.print("[red]Price data unavailable.[/red]")
         return
 
+    record_prices({item_id: data})
+    open_history("osrs").flush()
+
     try:
         quantity = int(input("Enter quantity: "))
     except ValueError:
@@ -151,11 +193,11 @@ def simulate_profit():
     sell_total = high_price * quantity
     profit_range = sell_total - buy_total
 
-    high_alch = item_entry.get("highalch", 0)
+    high_alch = item_entry.highalch or 0
     alch_profit = (high_alch - low_price) * quantity
 
     panel = Panel.fit(
-        f"[bold cyan]{item_entry['name']}[/bold cyan] (ID {item_id})\n\n"
+        f"[bold cyan]{item_entry.name}[/bold cyan] (ID {item_id})\n\n"
         f"[green]Buy (Low):[/green] {low_price} gp × {quantity} = {buy_total:,} gp\n"
         f"[green]Sell (High):[/green] {high_price} gp × {quantity} = {sell_total:,} gp\n"
         f"[yellow]Profit Range:[/yellow] {profit_range:,} gp\n\n"
@@ -165,7 +207,138 @@ def simulate_profit():
         border_style="blue"
     )
 
-    console.print(panel)
+    with metrics.span("render"):
+        console.print(panel)
+
+
+def import_watchlist(path=None):
+    path = path or input("Enter file to import (.csv, .json or .txt): ").strip()
+    from services import watchlist_io
+
+    try:
+        added, skipped, failed, mismatched = watchlist_io.import_osrs(path)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Import failed: {e}[/red]")
+        return
+
+    console.print(f"[green]Imported {added} item(s); {skipped} already on the watchlist.[/green]")
+    if failed:
+        console.print(f"[red]Could not resolve {len(failed)} name(s): {', '.join(failed[:20])}[/red]")
+    if mismatched:
+        console.print(f"[red]Skipped {len(mismatched)} entry(s) whose ID and name disagree: {'; '.join(mismatched[:20])}[/red]")
+
+
+def export_watchlist(path=None):
+    path = path or input("Enter file to export to (.csv or .xlsx) [osrs_watch.xlsx]: ").strip() or "osrs_watch.xlsx"
+    from services import watchlist_io
+
+    try:
+        watchlist_io.export_osrs(path)
+    except ImportError:
+        console.print("[red]Excel export needs openpyxl, which this build does not include. Export to .csv instead.[/red]")
+        return
+    except OSError as e:
+        console.print(f"[red]Export failed: {e}[/red]")
+        return
+    console.print(f"[green]Exported watchlist to {path}.[/green]")
+
+
+def backfill_history(timestep=None):
+    item_ids = watchlist.load_watchlist()
+
+    if not item_ids:
+        console.print("[yellow]Your watchlist is empty.[/yellow]")
+        return
+
+    from services import backfill
+
+    timestep = timestep or backfill.DEFAULT_TIMESTEP
+    with console.status(f"Fetching {timestep} price history for {len(item_ids)} item(s)..."):
+        stored, skipped, failed = backfill.backfill("osrs", item_ids, timestep)
+
+    console.print(f"[green]Stored {stored:,} price point(s); {skipped} item(s) were already up to date.[/green]")
+    if failed:
+        console.print(f"[red]Could not fetch history for {len(failed)} item(s): IDs {', '.join(map(str, failed[:20]))}[/red]")
+
+
+def show_price_history():
+    item_id_input = input("Enter item ID to show history for: ").strip()
+
+    if not item_id_input.isdigit():
+        console.print("[red]Invalid ID.[/red]")
+        return
+
+    item_id = int(item_id_input)
+    item_entry = get_mapping().get(item_id)
+    if not item_entry:
+        console.print("[red]Item not found in mapping.[/red]")
+        return
+
+    since = int(time.time()) - 30 * 86400
+    try:
+        from services import ohlc
+    except ImportError:
+        ohlc = None
+    if ohlc:
+        candles = ohlc.candles(open_history("osrs").history(item_id, start=since))
+        if candles.empty:
+            console.print("[yellow]No price history recorded for this item yet. Use [B] to backfill it.[/yellow]")
+            return
+        with metrics.span("render"):
+            console.print(ohlc.candle_table(f"{item_entry.name} - Daily candles (last 30 days)", candles))
+        return
+
+    rows = open_history("osrs").rollup(item_id, "daily", start=since)
+
+    if not rows:
+        console.print("[yellow]No price history recorded for this item yet. Use [B] to backfill it.[/yellow]")
+        return
+
+    table = Table(title=f"{item_entry.name} - Daily prices (last 30 days)")
+    table.add_column("Day", style="cyan")
+    table.add_column("Low", justify="right", style="red")
+    table.add_column("Avg Low", justify="right")
+    table.add_column("Avg High", justify="right")
+    table.add_column("High", justify="right", style="green")
+    table.add_column("Samples", justify="right", style="dim")
+
+    for row in rows:
+        table.add_row(
+            datetime.fromtimestamp(row["bucket"]).strftime("%Y-%m-%d"),
+            f"{row['low_min']:,}" if row["low_min"] is not None else "-",
+            f"{row['low_avg']:,.0f}" if row["low_avg"] is not None else "-",
+            f"{row['high_avg']:,.0f}" if row["high_avg"] is not None else "-",
+            f"{row['high_max']:,}" if row["high_max"] is not None else "-",
+            str(row["samples"]),
+        )
+
+    with metrics.span("render"):
+        console.print(table)
+
+
+def scan_market():
+    # pandas/numpy are only needed here, so they are imported on first use.
+    try:
+        from services import scanner
+    except ImportError:
+        console.print("[red]The market scanner needs numpy and pandas, which this build does not include.[/red]")
+        return
+
+    by = {"a": "alch", "r": "roi"}.get(input("Rank by [F]lip profit, [A]lch profit or [R]OI: ").strip().lower(), "flip")
+    results = scanner.scan_osrs(by=by, top=25)
+
+    if results.empty:
+        console.print("[yellow]No market data available.[/yellow]")
+        return
+
+    table = scanner.results_table(f"OSRS Market Scan - Top {len(results)} by {by}", results)
+    with metrics.span("render"):
+        console.print(table)
+
+
+def report_profile(label, started):
+    if metrics.enabled():
+        metrics.report(console, label, time.perf_counter() - started)
 
 
 def menu():
@@ -175,9 +348,17 @@ def menu():
         console.print("[3] Remove item by ID")
         console.print("[4] Search items")
         console.print("[5] Simulate market profit")
+        console.print("[6] Market scanner")
+        console.print("[7] Price history")
+        console.print("[B] Backfill price history")
+        console.print("[W] Watch watchlist live")
+        console.print("[I] Import watchlist")
+        console.print("[X] Export watchlist")
         console.print("[E] Exit")
 
         choice = input("Select option: ").strip().lower()
+        started = time.perf_counter()
+        metrics.reset()
 
         if choice == "1":
             show_watchlist()
@@ -194,11 +375,63 @@ def menu():
             search_items()
         elif choice == "5":
             simulate_profit()
+        elif choice == "6":
+            scan_market()
+        elif choice == "7":
+            show_price_history()
+        elif choice == "b":
+            backfill_history()
+        elif choice == "w":
+            from services import dashboard
+
+            dashboard.run("osrs")
+        elif choice == "i":
+            import_watchlist()
+        elif choice == "x":
+            export_watchlist()
         elif choice == "e":
             break
         else:
             console.print("[red]Invalid option. Please try again.[/red]")
 
+        report_profile(f"option {choice.upper()}", started)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="OSRS Market Watcher")
+    parser.add_argument("--daemon", action="store_true", help="poll the watchlist headlessly instead of showing the menu")
+    parser.add_argument("--import", dest="import_file", metavar="FILE", help="add every item in a .csv/.json/.txt file and exit")
+    parser.add_argument("--export", dest="export_file", metavar="FILE", help="write the watchlist with recorded prices to .csv/.xlsx and exit")
+    parser.add_argument("--backfill", nargs="?", const="6h", choices=["5m", "1h", "6h", "24h"], metavar="STEP",
+                        help="store the price history of every watchlist item at STEP (5m/1h/6h/24h, default 6h) and exit")
+    parser.add_argument("--watch", action="store_true", help="keep the watchlist on screen, refreshing it on an interval")
+    parser.add_argument("--profile", action="store_true", help="print where the time went after each action")
+    parser.add_argument("--metrics", metavar="FILE", help="in daemon mode, write timing and cache metrics to FILE (.json, or .prom for Prometheus) every cycle")
+    parser.add_argument("--interval", type=int, help="seconds between polls (default: 900 in daemon mode, 60 in watch mode)")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    menu()
+    args = parse_args()
+    if args.profile or args.metrics:
+        metrics.enable()
+    started = time.perf_counter()
+    if args.import_file:
+        import_watchlist(args.import_file)
+        report_profile("import", started)
+    elif args.export_file:
+        export_watchlist(args.export_file)
+        report_profile("export", started)
+    elif args.backfill:
+        backfill_history(args.backfill)
+        report_profile("backfill", started)
+    elif args.daemon:
+        from services import daemon
+
+        daemon.run("osrs", args.interval, args.metrics)
+    elif args.watch:
+        from services import dashboard
+
+        dashboard.run("osrs", args.interval)
+    else:
+        menu()
@@ -1,12 +1,20 @@
+import argparse
 import os
 from rich.console import Console
 from rich.table import Table
+from rich.live import Live
 from rich.panel import Panel
-from fetchers.rs3_scraper import get_exchange_info
-from fetchers.rs3_index import load_cached_index
+from fetchers.item_lookup import LookupFailed, cached_item, clear_failure, failure, get_item, resolve_id
+from fetchers.rs3_scraper import BASE_URL as EXCHANGE_URL, fetched_at
+from fetchers.rs3_index import load_search_index
+from fetchers.pool import fetch_all, host_of
+from fetchers import metrics
 from fetchers import rs3_search
 from storage import rs3_watchlist as watchlist
+from storage.price_history import open_history
 import sys
+import time
+from datetime import datetime
 
 VERSION = "1.1.1"
 
@@ -16,13 +24,49 @@ def clear_screen():
     input("\n[Press Enter to continue...]")
     os.system('cls' if os.name == 'nt' else 'clear')
 
-def show_watchlist():
-    items = watchlist.load_watchlist()
-
-    if not items:
-        console.print("[yellow]Your watchlist is empty.[/yellow]")
-        return
+def record_price(item_data):
+    # Stamped with the fetch time, so showing a cached lookup again overwrites its row instead of adding one.
+    if item_data.get("item_id"):
+        open_history("rs3").record(
+            item_data["item_id"], ge_price=item_data.get("ge_price"), volume=item_data.get("volume"),
+            timestamp=fetched_at(item_data),
+        )
 
+def watchlist_row(item_data, style=None):
+    ge_price = item_data.get("ge_price") or 0
+    high_alch = item_data.get("high_alch") or 0
+    low_alch = item_data.get("low_alch") or 0
+    store_price = item_data.get("store_price") or 0
+    buy_limit = item_data.get("buy_limit") or 0
+    volume = item_data.get("volume") or 0
+    alch_profit = high_alch - ge_price if ge_price else 0
+
+    cells = [
+        str(item_data["item_id"]),
+        item_data["name"].title(),
+        str(ge_price),
+        str(high_alch),
+        str(low_alch),
+        str(store_price),
+        str(buy_limit),
+        f"{volume:,}" if volume else "-",
+        f"{alch_profit:,} gp" if alch_profit >= 0 else f"[red]{alch_profit:,} gp[/red]",
+    ]
+    return [f"[{style}]{cell}[/{style}]" for cell in cells] if style else cells
+
+def pending_row(item):
+    return [str(item["id"]), item["name"].title()] + ["[dim]...[/dim]"] * 7
+
+def stale_row(item_data):
+    row = watchlist_row(item_data, style="dim")
+    row[1] += " [yellow](stale)[/yellow]"
+    return row
+
+def failed_row(item, missing):
+    note = "[red](not found)[/red]" if missing else "[yellow](unavailable)[/yellow]"
+    return [str(item["id"]), f"{item['name'].title()} {note}"] + ["[dim]-[/dim]"] * 7
+
+def watchlist_table(rows):
     table = Table(title="RS3 Market Watchlist")
     table.add_column("ID", justify="right", style="cyan")
     table.add_column("Name", style="bold")
@@ -34,62 +78,77 @@ def show_watchlist():
     table.add_column("Volume", justify="right")
     table.add_column("Alch Profit", justify="right", style="yellow")
 
-    for item in items:
-        try:
-            item_data = get_exchange_info(item["name"])
-        except Exception as e:
-            console.print(f"[red]Failed to fetch Exchange:{item['name']}: {e}[/red]")
-            continue
+    for row in rows:
+        table.add_row(*row)
+    return table
 
-        ge_price = item_data.get("ge_price", 0)
-        high_alch = item_data.get("high_alch", 0)
-        low_alch = item_data.get("low_alch", 0)
-        store_price = item_data.get("store_price", 0)
-        buy_limit = item_data.get("buy_limit", 0)
-        volume = item_data.get("volume", 0)
-        alch_profit = high_alch - ge_price if ge_price else 0
+def show_watchlist():
+    items = watchlist.load_watchlist()
 
-        table.add_row(
-            str(item_data["item_id"]),
-            item_data["name"].title(),
-            str(ge_price),
-            str(high_alch),
-            str(low_alch),
-            str(store_price),
-            str(buy_limit),
-            f"{volume:,}" if volume else "-",
-            f"{alch_profit:,} gp" if alch_profit >= 0 else f"[red]{alch_profit:,} gp[/red]",
-        )
+    if not items:
+        console.print("[yellow]Your watchlist is empty.[/yellow]")
+        return
 
-    console.print(table)
+    # Draw every row straight away from the lookup cache (dimmed), then swap in fresh rows as they arrive.
+    rows = {}
+    missing = 0
+    for item in items:
+        cached = cached_item(item_id=item["id"])
+        rows[item["id"]] = watchlist_row(cached, style="dim") if cached else pending_row(item)
+
+    with Live(watchlist_table(rows.values()), console=console, vertical_overflow="visible") as live:
+        results = fetch_all(items, lambda item: get_item(item["name"]), host=host_of(EXCHANGE_URL))
+
+        for item, item_data, error in results:
+            if error:
+                # Failures still inside their backoff were reported when they happened; just mark the row.
+                # Errors other than LookupFailed (cache or index I/O) leave the item "unavailable".
+                lookup_failed = isinstance(error, LookupFailed)
+                if not (lookup_failed and error.cached):
+                    console.print(f"[red]Failed to fetch Exchange:{item['name']}: {error}[/red]")
+                page_missing = lookup_failed and error.missing
+                cached = cached_item(item_id=item["id"])
+                rows[item["id"]] = stale_row(cached) if cached else failed_row(item, page_missing)
+                missing += page_missing
+            else:
+                record_price(item_data)
+                rows[item["id"]] = watchlist_row(item_data)
+            with metrics.span("render"):
+                live.update(watchlist_table(rows.values()), refresh=True)
+
+    # Write the buffered prices now rather than at exit, which closing the window skips.
+    open_history("rs3").flush()
+
+    if missing:
+        console.print(f"[yellow]{missing} item(s) have no Exchange page. Use [R] Repair watchlist names to fix them.[/yellow]")
+
+def add_by_name(name):
+    """Adds an item using the local name/ID dictionary, falling back to an Exchange lookup"""
+    resolved = resolve_id(name)
+    if resolved:
+        item_id, item_name = resolved
+    else:
+        item_data = get_item(name)
+        item_id, item_name = item_data["item_id"], item_data["name"]
+
+    watchlist.add_item(item_id, item_name)
+    console.print(f"[green]Added {item_name} (ID {item_id}) to watchlist.[/green]")
 
 def manual_add():
-    item_name = input("Enter item name to add: ").strip().lower().replace(" ", "_")
+    item_name = input("Enter item name to add: ").strip()
     try:
-        item_data = get_exchange_info(item_name)
-        watchlist.add_item(item_data["item_id"], item_data["name"])
-        console.print(f"[green]Added {item_data['name']} (ID {item_data['item_id']}) to watchlist.[/green]")
+        add_by_name(item_name)
     except Exception as e:
         console.print(f"[red]Item not found or failed to fetch: {e}[/red]")
 
 def search_items():
     term = input("Enter search term: ").strip().lower()
-    index = load_cached_index()
-
-    seen = set()
-    results = []
-
-    for item in index:
-        name = item["name"].lower()
-        if term in name and name not in seen:
-            seen.add(name)
-            results.append(item)
+    results = load_search_index().search(term)
 
     if not results:
         console.print("[yellow]No items found.[/yellow]")
         return
 
-    results.sort(key=lambda x: x["name"])
     per_page = 20
     total_pages = (len(results) + per_page - 1) // per_page
     page = 0
@@ -107,7 +166,8 @@ def search_items():
         for item in page_results:
             table.add_row(item["name"], str(item.get("price", "—")), item["url"])
 
-        console.print(table)
+        with metrics.span("render"):
+            console.print(table)
         console.print("[dim][N]ext, [P]rev, [A]dd <name>, [Q]uit[/dim]")
 
         cmd = input(">> ").strip().lower()
@@ -121,9 +181,7 @@ def search_items():
             match = next((item for item in results if item["name"].lower() == arg.lower()), None)
             if match:
                 try:
-                    item_data = get_exchange_info(match["name"])
-                    watchlist.add_item(item_data["item_id"], item_data["name"])
-                    console.print(f"[green]Added {item_data['name']} (ID {item_data['item_id']}) to watchlist.[/green]")
+                    add_by_name(match["name"])
                 except Exception as e:
                     console.print(f"[red]Failed to fetch item: {e}[/red]")
             else:
@@ -133,6 +191,14 @@ def search_items():
         else:
             console.print("[red]Unknown command.[/red]")
 
+def estimate_spread(item_id):
+    # The estimate is computed with pandas; without it the simulation prices both sides at the GE price.
+    try:
+        from services import ohlc
+    except ImportError:
+        return None
+    return ohlc.spread("rs3", item_id)
+
 def simulate_profit():
     items = watchlist.load_watchlist()
 
@@ -145,7 +211,8 @@ def simulate_profit():
     table.add_column("Name", style="bold")
     for item in items:
         table.add_row(str(item["id"]), item["name"])
-    console.print(table)
+    with metrics.span("render"):
+        console.print(table)
 
     raw_input = input("Enter item ID or name to simulate: ").strip().lower()
 
@@ -161,11 +228,18 @@ def simulate_profit():
         return
 
     try:
-        item_data = get_exchange_info(selected["name"])
+        item_data = get_item(selected["name"])
+    except LookupFailed as e:
+        hint = " Use [R] Repair watchlist names to correct it." if e.missing else ""
+        console.print(f"[red]Item fetch failed: {e}.{hint}[/red]")
+        return
     except Exception as e:
         console.print(f"[red]Item fetch failed: {e}[/red]")
         return
 
+    record_price(item_data)
+    open_history("rs3").flush()
+
     try:
         quantity = int(input("Enter quantity: "))
     except ValueError:
@@ -175,23 +249,111 @@ def simulate_profit():
     ge_price = item_data.get("ge_price", 0)
     high_alch = item_data.get("high_alch", 0)
 
-    buy_total = ge_price * quantity
-    sell_total = ge_price * quantity
+    estimate = estimate_spread(item_data["item_id"])
+    if estimate:
+        buy_price, sell_price = round(estimate["buy"]), round(estimate["sell"])
+        basis = f"Median low/high of {estimate['samples']} points over {estimate['days']} days"
+    else:
+        buy_price = sell_price = ge_price
+        basis = "No high/low history yet; [B] Backfill price history gives a real spread"
+
+    buy_total = buy_price * quantity
+    sell_total = sell_price * quantity
     profit_range = sell_total - buy_total
     alch_profit = (high_alch - ge_price) * quantity
 
     panel = Panel.fit(
         f"[bold cyan]{item_data['name']}[/bold cyan] (ID {item_data['item_id']})\n\n"
-        f"[green]Buy (GE):[/green] {ge_price} gp × {quantity} = {buy_total:,} gp\n"
-        f"[yellow]Estimated Sell:[/yellow] {sell_total:,} gp\n"
-        f"[yellow]Profit Range:[/yellow] {profit_range:,} gp\n\n"
+        f"[green]Buy:[/green] {buy_price:,} gp × {quantity} = {buy_total:,} gp\n"
+        f"[yellow]Estimated Sell:[/yellow] {sell_price:,} gp × {quantity} = {sell_total:,} gp\n"
+        f"[yellow]Profit Range:[/yellow] {profit_range:,} gp\n"
+        f"[dim]{basis}[/dim]\n\n"
         f"[magenta]High Alch:[/magenta] {high_alch} gp\n"
         f"[magenta]Alch Profit:[/magenta] {alch_profit:,} gp",
         title="Profit Simulation",
         border_style="blue"
     )
 
-    console.print(panel)
+    with metrics.span("render"):
+        console.print(panel)
+
+def show_price_history():
+    items = watchlist.load_watchlist()
+
+    if not items:
+        console.print("[yellow]Your watchlist is empty.[/yellow]")
+        return
+
+    raw_input = input("Enter item ID or name to show history for: ").strip().lower()
+
+    selected = None
+    if raw_input.isdigit():
+        item_id = int(raw_input)
+        selected = next((item for item in items if item["id"] == item_id), None)
+    else:
+        selected = next((item for item in items if item["name"].lower() == raw_input), None)
+
+    if not selected:
+        console.print("[red]Item not found in watchlist.[/red]")
+        return
+
+    since = int(time.time()) - 30 * 86400
+    try:
+        from services import ohlc
+    except ImportError:
+        ohlc = None
+    if ohlc:
+        candles = ohlc.candles(open_history("rs3").history(selected["id"], start=since))
+        if candles.empty:
+            console.print("[yellow]No price history recorded for this item yet.[/yellow]")
+            return
+        with metrics.span("render"):
+            console.print(ohlc.candle_table(f"{selected['name']} - Daily candles (last 30 days)", candles))
+        return
+
+    rows = open_history("rs3").rollup(selected["id"], "daily", start=since)
+
+    if not rows:
+        console.print("[yellow]No price history recorded for this item yet.[/yellow]")
+        return
+
+    table = Table(title=f"{selected['name']} - Daily GE Price (last 30 days)")
+    table.add_column("Day", style="cyan")
+    table.add_column("Min", justify="right", style="red")
+    table.add_column("Avg", justify="right")
+    table.add_column("Max", justify="right", style="green")
+    table.add_column("Volume", justify="right")
+    table.add_column("Samples", justify="right", style="dim")
+
+    for row in rows:
+        table.add_row(
+            datetime.fromtimestamp(row["bucket"]).strftime("%Y-%m-%d"),
+            f"{row['ge_min']:,}" if row["ge_min"] is not None else "-",
+            f"{row['ge_avg']:,.0f}" if row["ge_avg"] is not None else "-",
+            f"{row['ge_max']:,}" if row["ge_max"] is not None else "-",
+            f"{row['volume_avg']:,.0f}" if row["volume_avg"] is not None else "-",
+            str(row["samples"]),
+        )
+
+    with metrics.span("render"):
+        console.print(table)
+
+def backfill_history(timestep=None):
+    items = watchlist.load_watchlist()
+
+    if not items:
+        console.print("[yellow]Your watchlist is empty.[/yellow]")
+        return
+
+    from services import backfill
+
+    timestep = timestep or backfill.DEFAULT_TIMESTEP
+    with console.status(f"Fetching {timestep} price history for {len(items)} item(s)..."):
+        stored, skipped, failed = backfill.backfill("rs3", [item["id"] for item in items], timestep)
+
+    console.print(f"[green]Stored {stored:,} price point(s); {skipped} item(s) were already up to date.[/green]")
+    if failed:
+        console.print(f"[red]Could not fetch history for {len(failed)} item(s): IDs {', '.join(map(str, failed[:20]))}[/red]")
 
 def remove_item():
     items = watchlist.load_watchlist()
@@ -205,7 +367,8 @@ def remove_item():
     table.add_column("Name", style="bold")
     for item in items:
         table.add_row(str(item["id"]), item["name"])
-    console.print(table)
+    with metrics.span("render"):
+        console.print(table)
 
     raw_input = input("Enter item ID or name to remove: ").strip().lower()
 
@@ -223,6 +386,103 @@ def remove_item():
     watchlist.remove_item(selected["id"])
     console.print(f"[red]Removed {selected['name']} (ID {selected['id']}) from watchlist.[/red]")
 
+def repair_watchlist():
+    """Offers index names for watchlist entries whose Exchange page does not exist"""
+    index = load_search_index()
+    broken = []
+    for item in watchlist.load_watchlist():
+        failed = failure(item["name"])
+        if failed and failed["missing"]:
+            broken.append(item)
+        elif not failed and index.get(item["name"]) is None and not cached_item(item_id=item["id"]):
+            broken.append(item)  # never fetched and unknown locally, most likely misspelled
+
+    if not broken:
+        console.print("[green]Every watchlist entry resolves to an Exchange page.[/green]")
+        return
+
+    repaired = 0
+    for item in broken:
+        suggestions = index.search(item["name"], fuzzy=True, limit=3)
+        if not suggestions:
+            console.print(f"[yellow]{item['name']} (ID {item['id']}): no similar names in the index.[/yellow]")
+            continue
+
+        table = Table(title=f"{item['name']} (ID {item['id']})")
+        table.add_column("#", justify="right", style="cyan")
+        table.add_column("Suggested name", style="bold")
+        table.add_column("Price", justify="right")
+        for number, entry in enumerate(suggestions, start=1):
+            table.add_row(str(number), entry["name"], str(entry.get("price", "—")))
+        with metrics.span("render"):
+            console.print(table)
+
+        choice = input(f"Replace with [1-{len(suggestions)}], or Enter to skip: ").strip()
+        if not choice.isdigit() or not 1 <= int(choice) <= len(suggestions):
+            continue
+
+        name = suggestions[int(choice) - 1]["name"]
+        item_id, name = resolve_id(name) or (item["id"], name)
+        watchlist.replace_item(item["id"], item_id, name)
+        clear_failure(item["name"])
+        console.print(f"[green]{item['name']} is now {name} (ID {item_id}).[/green]")
+        repaired += 1
+
+    console.print(f"[green]Repaired {repaired} of {len(broken)} entr{'y' if len(broken) == 1 else 'ies'}.[/green]")
+
+def import_watchlist(path=None):
+    path = path or input("Enter file to import (.csv, .json or .txt): ").strip()
+    from services import watchlist_io
+
+    try:
+        added, skipped, failed, mismatched = watchlist_io.import_rs3(path)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Import failed: {e}[/red]")
+        return
+
+    console.print(f"[green]Imported {added} item(s); {skipped} already on the watchlist.[/green]")
+    if failed:
+        console.print(f"[red]Could not resolve {len(failed)} name(s): {', '.join(failed[:20])}[/red]")
+    if mismatched:
+        console.print(f"[red]Skipped {len(mismatched)} entry(s) whose ID and name disagree: {'; '.join(mismatched[:20])}[/red]")
+
+def export_watchlist(path=None):
+    path = path or input("Enter file to export to (.csv or .xlsx) [watch_cache.xlsx]: ").strip() or "watch_cache.xlsx"
+    from services import watchlist_io
+
+    try:
+        watchlist_io.export_rs3(path)
+    except ImportError:
+        console.print("[red]Excel export needs openpyxl, which this build does not include. Export to .csv instead.[/red]")
+        return
+    except OSError as e:
+        console.print(f"[red]Export failed: {e}[/red]")
+        return
+    console.print(f"[green]Exported watchlist to {path}.[/green]")
+
+def scan_market():
+    # pandas/numpy are only needed here, so they are imported on first use.
+    try:
+        from services import scanner
+    except ImportError:
+        console.print("[red]The market scanner needs numpy and pandas, which this build does not include.[/red]")
+        return
+
+    by = {"a": "alch", "r": "roi"}.get(input("Rank by [F]lip profit, [A]lch profit or [R]OI: ").strip().lower(), "flip")
+    results = scanner.scan_rs3(by=by, top=25)
+
+    if results.empty:
+        console.print("[yellow]No market data available.[/yellow]")
+        return
+
+    table = scanner.results_table(f"RS3 Market Scan - Top {len(results)} by {by}", results)
+    with metrics.span("render"):
+        console.print(table)
+
+def report_profile(label, started):
+    if metrics.enabled():
+        metrics.report(console, label, time.perf_counter() - started)
+
 def menu():
     while True:
         console.print("[bold cyan]RS3 Market Watcher[/bold cyan]")
@@ -233,9 +493,18 @@ def menu():
         console.print("[5] Simulate market profit")
         console.print("[6] Search wiki item by name")
         console.print("[7] Refresh search cache")
+        console.print("[8] Price history")
+        console.print("[B] Backfill price history")
+        console.print("[9] Market scanner")
+        console.print("[W] Watch watchlist live")
+        console.print("[R] Repair watchlist names")
+        console.print("[I] Import watchlist")
+        console.print("[X] Export watchlist")
         console.print("[E] Exit")
 
         choice = input("Select option: ").strip().lower()
+        started = time.perf_counter()
+        metrics.reset()
 
         if choice == "1":
             show_watchlist()
@@ -252,16 +521,74 @@ def menu():
         elif choice == "7":
             rs3_search.refresh_cache(force=True)
             console.print("[green]Search cache refreshed.[/green]")
+        elif choice == "8":
+            show_price_history()
+        elif choice == "b":
+            backfill_history()
+        elif choice == "9":
+            scan_market()
+        elif choice == "w":
+            from services import dashboard
+
+            dashboard.run("rs3")
+            continue  # the live view is left with Ctrl+C; no need to pause
+        elif choice == "r":
+            repair_watchlist()
+        elif choice == "i":
+            import_watchlist()
+        elif choice == "x":
+            export_watchlist()
         elif choice == "e":
             break
         else:
             console.print("[red]Invalid option. Please try again.[/red]")
 
+        report_profile(f"option {choice.upper()}", started)
         clear_screen()
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="RS3 Market Watcher")
+    parser.add_argument("--version", action="store_true", help="print the version and exit")
+    parser.add_argument("--daemon", action="store_true", help="poll the watchlist headlessly instead of showing the menu")
+    parser.add_argument("--import", dest="import_file", metavar="FILE", help="add every item in a .csv/.json/.txt file and exit")
+    parser.add_argument("--export", dest="export_file", metavar="FILE", help="write the watchlist with cached prices to .csv/.xlsx and exit")
+    parser.add_argument("--backfill", nargs="?", const="6h", choices=["5m", "1h", "6h", "24h"], metavar="STEP",
+                        help="store the price history of every watchlist item at STEP (5m/1h/6h/24h, default 6h) and exit")
+    parser.add_argument("--watch", action="store_true", help="keep the watchlist on screen, refreshing it on an interval")
+    parser.add_argument("--profile", action="store_true", help="print where the time went after each action")
+    parser.add_argument("--metrics", metavar="FILE", help="in daemon mode, write timing and cache metrics to FILE (.json, or .prom for Prometheus) every cycle")
+    parser.add_argument("--interval", type=int, help="seconds between polls (default: 900 in daemon mode, 300 in watch mode)")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "--version":
+    args = parse_args()
+    if args.version:
         print(f"RS3 Market Watcher v{VERSION}")
         sys.exit(0)
+    if args.profile or args.metrics:
+        metrics.enable()
+    started = time.perf_counter()
+    if args.import_file:
+        import_watchlist(args.import_file)
+        report_profile("import", started)
+        sys.exit(0)
+    if args.export_file:
+        export_watchlist(args.export_file)
+        report_profile("export", started)
+        sys.exit(0)
+    if args.backfill:
+        backfill_history(args.backfill)
+        report_profile("backfill", started)
+        sys.exit(0)
+    if args.daemon:
+        from services import daemon
+
+        daemon.run("rs3", args.interval, args.metrics)
+        sys.exit(0)
+    if args.watch:
+        from services import dashboard
+
+        dashboard.run("rs3", args.interval)
+        sys.exit(0)
     menu()
 
@@ -10,18 +10,21 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # numpy, pandas and openpyxl stay in: the scanner, candles and .xlsx export need them,
+    # and they are only imported when those features are used. Only unused packages are left out.
+    excludes=['tkinter', 'matplotlib', 'PIL', 'IPython', 'pytest'],
     noarchive=False,
     optimize=0,
 )
 pyz = PYZ(a.pure)
 
+# A onedir build: nothing is unpacked to a temporary directory at launch, so the bundled
+# numpy/pandas cost disk space but not startup time.
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='rs3_watch',
     debug=False,
     bootloader_ignore_signals=False,
@@ -37,3 +40,12 @@ exe = EXE(
     entitlements_file=None,
     icon=['rs3_icon.ico'],
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    name='rs3_watch',
+)
@@ -0,0 +1,170 @@
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+
+DEFAULT_WINDOW = 3600  # seconds looked back by move_pct rules
+
+
+@dataclass
+class Alert:
+    item_id: int
+    name: str
+    message: str
+    price: int
+    timestamp: int
+
+
+class _Rule(ABC):
+    """Edge-triggered threshold: fires once when the condition becomes true, re-arms when it clears"""
+
+    def __init__(self, value):
+        self.value = value
+        self._active = False
+
+    @abstractmethod
+    def check(self, price, high_alch, timestamp):
+        """Returns a message while the condition holds, otherwise None"""
+
+    def update(self, price, high_alch, timestamp):
+        message = self.check(price, high_alch, timestamp)
+        fired = message is not None and not self._active
+        self._active = message is not None
+        return message if fired else None
+
+
+class PriceBelow(_Rule):
+    def check(self, price, high_alch, timestamp):
+        if price < self.value:
+            return f"price {price:,} gp is below {self.value:,} gp"
+
+
+class PriceAbove(_Rule):
+    def check(self, price, high_alch, timestamp):
+        if price > self.value:
+            return f"price {price:,} gp is above {self.value:,} gp"
+
+
+class AlchMarginAbove(_Rule):
+    def check(self, price, high_alch, timestamp):
+        if high_alch and high_alch - price > self.value:
+            return f"alch margin {high_alch - price:,} gp is above {self.value:,} gp"
+
+
+class MovePct(_Rule):
+    """Fires when the price moves more than value% from the window's low or high.
+
+    Monotonic deques keep the window minimum and maximum at their fronts, so
+    each update is amortised O(1) however many observations the window holds.
+    """
+
+    def __init__(self, value, window=DEFAULT_WINDOW):
+        super().__init__(value)
+        self.window = window
+        self._lows = deque()
+        self._highs = deque()
+
+    def _push(self, price, timestamp):
+        while self._lows and self._lows[-1][1] >= price:
+            self._lows.pop()
+        self._lows.append((timestamp, price))
+        while self._highs and self._highs[-1][1] <= price:
+            self._highs.pop()
+        self._highs.append((timestamp, price))
+
+        cutoff = timestamp - self.window
+        while self._lows[0][0] < cutoff:
+            self._lows.popleft()
+        while self._highs[0][0] < cutoff:
+            self._highs.popleft()
+
+    def check(self, price, high_alch, timestamp):
+        self._push(price, timestamp)
+        low, high = self._lows[0][1], self._highs[0][1]
+
+        if low and (price - low) * 100 > self.value * low:
+            return f"price up {(price - low) * 100 / low:.1f}% to {price:,} gp within {self.window // 60} min"
+        if high and (high - price) * 100 > self.value * high:
+            return f"price down {(high - price) * 100 / high:.1f}% to {price:,} gp within {self.window // 60} min"
+
+
+RULE_TYPES = {
+    "price_below": PriceBelow,
+    "price_above": PriceAbove,
+    "alch_margin_above": AlchMarginAbove,
+    "move_pct": MovePct,
+}
+
+
+def _number(spec, key):
+    """spec[key] as an int or float; strings such as "8000" from hand-edited files are accepted"""
+    if key not in spec:
+        raise ValueError(f"{spec.get('type')} alert has no {key}")
+    try:
+        number = float(spec[key])
+    except (TypeError, ValueError):
+        number = math.nan
+    if not math.isfinite(number):
+        raise ValueError(f"{spec.get('type')} alert {key} is not a number: {spec[key]!r}")
+    return int(number) if number.is_integer() else number
+
+
+def compile_rules(specs) -> list:
+    """Turns watchlist rule specs like {"type": "move_pct", "value": 5, "window": 3600} into rule objects.
+
+    Values are checked here so a bad rule is reported once by sync() rather than failing every poll.
+    """
+    rules = []
+    for spec in specs or []:
+        rule_type = RULE_TYPES.get(spec.get("type"))
+        if rule_type is None:
+            raise ValueError(f"Unknown alert type: {spec.get('type')!r}")
+        options = {key: val for key, val in spec.items() if key not in ("type", "value")}
+        if "window" in options:
+            options["window"] = int(_number(spec, "window"))
+            if options["window"] <= 0:
+                raise ValueError(f"{spec['type']} alert window must be positive: {spec['window']!r}")
+        rules.append(rule_type(_number(spec, "value"), **options))
+    return rules
+
+
+class AlertEngine:
+    """Evaluates each watchlist entry's compiled rules against new observations"""
+
+    def __init__(self):
+        self._entries = {}
+
+    def sync(self, watchlist_items) -> list[str]:
+        """Compiles rules for new or edited entries; untouched entries keep their rolling state.
+
+        Returns an error message per entry whose rules could not be compiled.
+        """
+        current = {}
+        errors = []
+        for item in watchlist_items:
+            specs = item.get("alerts") or []
+            previous = self._entries.get(item["id"])
+            if previous and previous[0] == specs:
+                current[item["id"]] = previous
+            elif specs:
+                try:
+                    rules = compile_rules(specs)
+                except (KeyError, TypeError, ValueError) as e:
+                    errors.append(f"Invalid alerts for {item['name']}: {e}")
+                    rules = []
+                current[item["id"]] = (specs, item["name"], rules)
+        self._entries = current
+        return errors
+
+    def update(self, item_id, price, high_alch=None, timestamp=0) -> list[Alert]:
+        entry = self._entries.get(item_id)
+        if entry is None or price is None:
+            return []
+
+        _, name, rules = entry
+        alerts = []
+        for rule in rules:
+            message = rule.update(price, high_alch, timestamp)
+            if message:
+                alerts.append(Alert(item_id, name, message, price, timestamp))
+        return alerts
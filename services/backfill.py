@@ -0,0 +1,55 @@
+import time
+
+from fetchers import osrs_api, rs3_api, scheduler
+from fetchers.pool import fetch_all, host_of
+from storage.price_history import open_history
+
+APIS = {"rs3": rs3_api, "osrs": osrs_api}
+DEFAULT_TIMESTEP = "6h"  # 365 points of 6 hours reach back three months
+
+
+def _rows(item_id, points, after, with_ge_price):
+    """Turns timeseries points newer than after into observation tuples"""
+    for point in points:
+        if point["timestamp"] <= after:
+            continue
+        high, low = point.get("avgHighPrice"), point.get("avgLowPrice")
+        volumes = [v for v in (point.get("highPriceVolume"), point.get("lowPriceVolume")) if v is not None]
+        # RS3 rollups and charts read ge_price, which the API does not have; the mid price stands in for it.
+        prices = [p for p in (high, low) if p is not None]
+        ge_price = round(sum(prices) / len(prices)) if with_ge_price and prices else None
+        yield item_id, point["timestamp"], high, low, ge_price, sum(volumes) if volumes else None
+
+
+def backfill(game: str, item_ids, timestep: str = DEFAULT_TIMESTEP) -> tuple:
+    """Stores the API timeseries of every item, fetching them concurrently.
+
+    Each item resumes after the newest point stored by an earlier backfill at
+    the same timestep, and items with no newer complete point yet are skipped
+    without a request. Returns (points stored, items skipped, IDs that failed).
+    """
+    api = APIS[game]
+    history = open_history(game)
+    step = api.TIMESTEPS[timestep]
+    now = time.time()
+
+    resume = {item_id: history.backfilled_until(item_id, timestep) or 0 for item_id in item_ids}
+    # The newest point is the last complete step, so nothing new exists until two steps after it.
+    due = [item_id for item_id, until in resume.items() if until + 2 * step <= now]
+
+    stored, failed = 0, []
+    # A bulk download; price lookups the user is waiting on go first.
+    with scheduler.priority(scheduler.BACKGROUND):
+        results = fetch_all(due, lambda item_id: api.fetch_timeseries(item_id, timestep), host=host_of(api.BASE_URL))
+        for item_id, points, error in results:
+            if error:
+                failed.append(item_id)
+                continue
+            rows = list(_rows(item_id, points, resume[item_id], game == "rs3"))
+            history.record_many(rows)
+            if points:
+                history.mark_backfilled(item_id, timestep, max(point["timestamp"] for point in points))
+            stored += len(rows)
+
+    history.flush()
+    return stored, len(resume) - len(due), failed
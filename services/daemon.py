@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+from rich.console import Console
+
+from fetchers import metrics, scheduler, transport
+from fetchers.osrs_api import fetch_latest_many
+from fetchers.item_lookup import LookupFailed, get_item
+from fetchers.rs3_scraper import fetched_at
+from services.alerts import AlertEngine
+from storage import osrs_watchlist, rs3_watchlist
+from storage.price_history import open_history
+
+DEFAULT_INTERVAL = 15 * 60  # seconds between polls of the same item
+MAX_IN_FLIGHT = 4
+
+console = Console()
+
+
+class _Poller:
+    """Remembers the last observation per item so unchanged prices are not written again"""
+
+    def __init__(self, game):
+        self.history = open_history(game)
+        self.alerts = AlertEngine()
+        self.last_seen = {}
+
+    def changed(self, item_id, observation) -> bool:
+        if self.last_seen.get(item_id) == observation:
+            return False
+        self.last_seen[item_id] = observation
+        return True
+
+    def forget_except(self, item_ids):
+        # Entries removed from the watchlist must not keep state alive for weeks.
+        for item_id in self.last_seen.keys() - set(item_ids):
+            del self.last_seen[item_id]
+
+
+async def _poll_rs3_item(poller, item, slots, interval):
+    async with slots:
+        try:
+            data = await asyncio.to_thread(get_item, item["name"], interval / 2)
+        except LookupFailed as e:
+            if not e.cached:
+                console.log(f"[red]Failed to fetch Exchange:{item['name']}: {e}[/red]")
+            return
+        except Exception as e:
+            console.log(f"[red]Failed to fetch Exchange:{item['name']}: {e!r}[/red]")
+            return
+
+    # A locked database or a bad rule must cost this item's update, not the daemon;
+    # each is handled on its own so one failing does not skip the other.
+    try:
+        if poller.changed(item["id"], (data.get("ge_price"), data.get("volume"))):
+            item_id = data.get("item_id") or item["id"]
+            poller.history.record(item_id, ge_price=data.get("ge_price"), volume=data.get("volume"),
+                                  timestamp=fetched_at(data))
+    except Exception as e:
+        console.log(f"[red]Failed to record {item['name']}: {e!r}[/red]")
+
+    try:
+        for alert in poller.alerts.update(item["id"], data.get("ge_price"), data.get("high_alch"), int(time.time())):
+            console.log(f"[bold yellow]ALERT[/bold yellow] {alert.name}: {alert.message}")
+    except Exception as e:
+        console.log(f"[red]Failed to check alerts for {item['name']}: {e!r}[/red]")
+
+
+def _dump_metrics(path):
+    if not path:
+        return
+    try:
+        metrics.dump(path, extra_counts={f"http.{name}": n for name, n in transport.stats().items()})
+    except OSError as e:
+        console.log(f"[red]Could not write metrics to {path}: {e}[/red]")
+
+
+async def _rs3_cycle(poller, slots, interval, started):
+    items = rs3_watchlist.load_watchlist()
+    poller.forget_except(item["id"] for item in items)
+    for error in poller.alerts.sync(items):
+        console.log(f"[red]{error}[/red]")
+    spacing = interval / max(1, len(items))
+
+    tasks = []
+    for position, item in enumerate(items):
+        delay = started + position * spacing - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(_poll_rs3_item(poller, item, slots, interval)))
+    await asyncio.gather(*tasks)
+
+    poller.history.flush()
+    console.log(f"Polled {len(items)} RS3 item(s) in {time.monotonic() - started:.1f}s")
+
+
+async def _osrs_cycle(poller):
+    ids = osrs_watchlist.load_watchlist()
+    poller.forget_except(ids)
+
+    prices = await asyncio.to_thread(fetch_latest_many, ids)
+    written = 0
+    for item_id, data in prices.items():
+        observation = (data.get("high"), data.get("highTime"), data.get("low"), data.get("lowTime"))
+        if poller.changed(item_id, observation):
+            timestamp = max(data.get("highTime") or 0, data.get("lowTime") or 0)
+            poller.history.record(item_id, high=data.get("high"), low=data.get("low"), timestamp=timestamp)
+            written += 1
+
+    poller.history.flush()
+    console.log(f"Polled {len(ids)} OSRS item(s), {written} changed")
+
+
+async def poll_rs3(interval=DEFAULT_INTERVAL, cycles=None, metrics_file=None):
+    """Polls the RS3 watchlist forever, spreading each cycle's page fetches evenly across the interval"""
+    poller = _Poller("rs3")
+    slots = asyncio.Semaphore(MAX_IN_FLIGHT)
+    cycle = 0
+
+    while cycles is None or cycle < cycles:
+        started = time.monotonic()
+        try:
+            await _rs3_cycle(poller, slots, interval, started)
+        except Exception as e:
+            console.log(f"[red]RS3 poll cycle failed: {e!r}[/red]")
+        _dump_metrics(metrics_file)
+        cycle += 1
+        await asyncio.sleep(max(0.0, started + interval - time.monotonic()))
+
+
+async def poll_osrs(interval=DEFAULT_INTERVAL, cycles=None, metrics_file=None):
+    """Polls the OSRS watchlist forever; each cycle is one bulk /latest request"""
+    poller = _Poller("osrs")
+    cycle = 0
+
+    while cycles is None or cycle < cycles:
+        started = time.monotonic()
+        try:
+            await _osrs_cycle(poller)
+        except Exception as e:
+            console.log(f"[red]OSRS poll cycle failed: {e!r}[/red]")
+        _dump_metrics(metrics_file)
+        cycle += 1
+        await asyncio.sleep(max(0.0, started + interval - time.monotonic()))
+
+
+def run(game, interval=None, metrics_file=None):
+    """Runs the headless poller for 'rs3' or 'osrs' until interrupted, dumping metrics each cycle if asked"""
+    interval = interval or DEFAULT_INTERVAL
+    if metrics_file:
+        metrics.enable()
+    poll = poll_rs3 if game == "rs3" else poll_osrs
+    console.log(f"Starting {game.upper()} daemon, polling every {interval}s (Ctrl+C to stop)")
+    try:
+        with scheduler.priority(scheduler.BACKGROUND):
+            asyncio.run(poll(interval, metrics_file=metrics_file))
+    except KeyboardInterrupt:
+        console.log("Daemon stopped.")
+    finally:
+        open_history(game).flush()
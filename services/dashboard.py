@@ -0,0 +1,229 @@
+import time
+from datetime import datetime
+
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+
+from fetchers import scheduler
+from fetchers.item_lookup import LookupFailed, cached_item, get_item
+from fetchers.osrs_api import LATEST_TTL, fetch_latest_many
+from fetchers.osrs_mapping import get_mapping
+from fetchers.pool import fetch_all, host_of
+from fetchers.rs3_scraper import BASE_URL as EXCHANGE_URL, fetched_at
+from storage import osrs_watchlist, rs3_watchlist
+from storage.price_history import open_history
+
+RS3_INTERVAL = 5 * 60  # seconds before an Exchange page is fetched again
+OSRS_INTERVAL = LATEST_TTL
+TICK = 1.0  # seconds between checks for due items and watchlist edits
+
+RS3_COLUMNS = [
+    ("ID", {"justify": "right", "style": "cyan"}),
+    ("Name", {"style": "bold"}),
+    ("GE Price", {"justify": "right"}),
+    ("High Alch", {"justify": "right", "style": "magenta"}),
+    ("Alch Profit", {"justify": "right"}),
+    ("Buy Limit", {"justify": "right"}),
+    ("Volume", {"justify": "right"}),
+]
+OSRS_COLUMNS = [
+    ("ID", {"justify": "center", "style": "cyan"}),
+    ("Name", {"style": "bold"}),
+    ("High", {"justify": "right"}),
+    ("Low", {"justify": "right"}),
+    ("Spread", {"justify": "right"}),
+    ("Updated", {"justify": "center"}),
+]
+
+console = Console()
+
+
+def _format(value, previous):
+    if value is None:
+        return "-"
+    if not isinstance(value, (int, float)):
+        return str(value)
+    text = f"{value:,}"
+    if previous is None or not isinstance(previous, (int, float)) or value == previous:
+        return text
+    return f"[green]▲ {text}[/green]" if value > previous else f"[red]▼ {text}[/red]"
+
+
+class Dashboard:
+    """Watch table that keeps each row's rendered cells and only rebuilds what changed.
+
+    A row's cells are re-formatted only when one of its values differs from the
+    last update, and the table is rebuilt only after such a change, so an idle
+    refresh costs nothing. Numeric moves are shown with a coloured arrow until
+    the value moves again.
+    """
+
+    def __init__(self, title, columns):
+        self.title = title
+        self.columns = columns
+        self._values = {}  # key -> raw values of the row
+        self._cells = {}   # key -> rendered cells of the row
+        self._table = None
+        self.last_change = None
+
+    def __contains__(self, key):
+        return key in self._cells
+
+    def update(self, key, values, stale=False) -> bool:
+        """Sets a row's values; returns whether any cell changed"""
+        values = list(values)
+        previous = self._values.get(key)
+        if previous == values and not stale:
+            return False
+
+        cells = [_format(value, old) for value, old in zip(values, previous or [None] * len(values))]
+        if stale:
+            cells = [f"[dim]{cell}[/dim]" for cell in cells]
+        if self._cells.get(key) == cells:
+            return False
+
+        # A stale placeholder is not a real observation, so it is not compared against later.
+        if not stale:
+            self._values[key] = values
+        self._cells[key] = cells
+        self._table = None
+        self.last_change = time.time()
+        return True
+
+    def retain(self, keys) -> bool:
+        """Drops rows whose key is no longer watched; returns whether any were removed"""
+        removed = self._cells.keys() - set(keys)
+        for key in removed:
+            self._cells.pop(key, None)
+            self._values.pop(key, None)
+        if removed:
+            self._table = None
+        return bool(removed)
+
+    def table(self, caption=None) -> Table:
+        if self._table is None:
+            table = Table(title=self.title, caption=caption)
+            for header, options in self.columns:
+                table.add_column(header, **options)
+            for cells in self._cells.values():
+                table.add_row(*cells)
+            self._table = table
+        return self._table
+
+
+def _caption(dashboard, interval):
+    changed = datetime.fromtimestamp(dashboard.last_change).strftime("%H:%M:%S") if dashboard.last_change else "-"
+    return f"Changed {changed} · every {interval}s · Ctrl+C to stop"
+
+
+def _rs3_values(item, data):
+    ge_price = data.get("ge_price")
+    high_alch = data.get("high_alch")
+    alch_profit = high_alch - ge_price if ge_price and high_alch else None
+    return [str(item["id"]), item["name"].title(), ge_price, high_alch, alch_profit, data.get("buy_limit"), data.get("volume")]
+
+
+def _osrs_values(item_id, name, high, low, timestamp):
+    spread = high - low if high and low else None
+    updated = datetime.fromtimestamp(timestamp).strftime("%H:%M:%S") if timestamp else None
+    return [str(item_id), name, high, low, spread, updated]
+
+
+def watch_rs3(interval=RS3_INTERVAL):
+    """Keeps the RS3 watchlist on screen, refetching each item once it is interval seconds old"""
+    dashboard = Dashboard("RS3 Market Watch", RS3_COLUMNS)
+    history = open_history("rs3")
+    due = {}  # item id -> monotonic time of its next fetch
+
+    with Live(dashboard.table(), console=console, auto_refresh=False, vertical_overflow="visible") as live:
+        while True:
+            items = rs3_watchlist.load_watchlist()
+            changed = dashboard.retain(item["id"] for item in items)
+
+            now = time.monotonic()
+            pending = []
+            for item in items:
+                if item["id"] not in due:
+                    cached = cached_item(item_id=item["id"])
+                    if cached:
+                        changed |= dashboard.update(item["id"], _rs3_values(item, cached), stale=True)
+                    due[item["id"]] = now
+                if due[item["id"]] <= now:
+                    pending.append(item)
+
+            for item, data, error in fetch_all(pending, lambda item: get_item(item["name"], interval),
+                                               host=host_of(EXCHANGE_URL)):
+                due[item["id"]] = time.monotonic() + interval
+                if error:
+                    lookup_failed = isinstance(error, LookupFailed)
+                    if not (lookup_failed and error.cached):
+                        live.console.print(f"[red]Failed to fetch Exchange:{item['name']}: {error}[/red]")
+                    if item["id"] not in dashboard:
+                        values = _rs3_values(item, {})
+                        values[1] += " (not found)" if lookup_failed and error.missing else " (unavailable)"
+                        changed |= dashboard.update(item["id"], values, stale=True)
+                    continue
+                if dashboard.update(item["id"], _rs3_values(item, data)):
+                    history.record(item["id"], ge_price=data.get("ge_price"), volume=data.get("volume"),
+                                   timestamp=fetched_at(data))
+                    changed = True
+
+            for item_id in due.keys() - {item["id"] for item in items}:
+                del due[item_id]
+
+            if changed:
+                live.update(dashboard.table(_caption(dashboard, interval)), refresh=True)
+            history.flush()
+            time.sleep(TICK)
+
+
+def watch_osrs(interval=OSRS_INTERVAL):
+    """Keeps the OSRS watchlist on screen with one bulk price request per interval"""
+    dashboard = Dashboard("OSRS Market Watch", OSRS_COLUMNS)
+    history = open_history("osrs")
+    mapping = get_mapping()
+    next_poll = 0.0
+
+    with Live(dashboard.table(), console=console, auto_refresh=False, vertical_overflow="visible") as live:
+        while True:
+            ids = [item_id for item_id in osrs_watchlist.load_watchlist() if mapping.get(item_id)]
+            changed = dashboard.retain(ids)
+
+            for item_id in ids:
+                if item_id not in dashboard:
+                    latest = history.latest(item_id) or {}
+                    values = _osrs_values(item_id, mapping.get(item_id).name, latest.get("high"), latest.get("low"),
+                                          latest.get("timestamp"))
+                    changed |= dashboard.update(item_id, values, stale=True)
+                    next_poll = 0.0
+
+            if time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + interval
+                for item_id, data in fetch_latest_many(ids).items():
+                    timestamp = max(data.get("highTime") or 0, data.get("lowTime") or 0)
+                    values = _osrs_values(item_id, mapping.get(item_id).name, data.get("high"), data.get("low"),
+                                          timestamp)
+                    if dashboard.update(item_id, values):
+                        history.record(item_id, high=data.get("high"), low=data.get("low"), timestamp=timestamp)
+                        changed = True
+
+            if changed:
+                live.update(dashboard.table(_caption(dashboard, interval)), refresh=True)
+            history.flush()
+            time.sleep(TICK)
+
+
+def run(game, interval=None):
+    """Runs the watch view for 'rs3' or 'osrs' until interrupted"""
+    if game == "rs3":
+        watch, interval = watch_rs3, interval or RS3_INTERVAL
+    else:
+        watch, interval = watch_osrs, interval or OSRS_INTERVAL
+    try:
+        with scheduler.priority(scheduler.NORMAL):
+            watch(interval)
+    except KeyboardInterrupt:
+        console.print("[cyan]Stopped watching.[/cyan]")
+    finally:
+        open_history(game).flush()
@@ -0,0 +1,92 @@
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from rich.table import Table
+
+from storage.price_history import open_history
+
+MA_WINDOWS = (7, 30)  # candles averaged by each moving-average column
+SPREAD_DAYS = 7       # history the buy/sell estimate is taken from
+NUMERIC = ("timestamp", "high", "low", "ge_price", "volume")
+
+
+def frame(rows) -> pd.DataFrame:
+    """Observations from PriceHistory.history() as a time-indexed frame with one price per row.
+
+    The price is ge_price where recorded and otherwise the mean of high and
+    low, so RS3 Exchange samples and API timeseries points chart together.
+    """
+    # One float array for all columns (None becomes NaN) is far cheaper than letting pandas infer per column.
+    values = np.array([[row[column] for column in NUMERIC] for row in rows], dtype="float64").reshape(-1, len(NUMERIC))
+    timestamp, high, low, ge_price, volume = values.T
+    mid = np.where(np.isnan(high), low, np.where(np.isnan(low), high, (high + low) / 2))
+    return pd.DataFrame(
+        {"high": high, "low": low, "ge_price": ge_price, "volume": volume,
+         "price": np.where(np.isnan(ge_price), mid, ge_price)},
+        index=pd.to_datetime(timestamp.astype("int64"), unit="s"),
+    )
+
+
+def candles(rows, freq: str = "1D", windows=MA_WINDOWS) -> pd.DataFrame:
+    """Resamples observations into candles with mean volume and moving averages of close.
+
+    Open and close follow the per-row price; high and low are the highest
+    high and lowest low recorded in the bucket.
+
+    Buckets without observations are dropped before the averages are taken,
+    so a gap in the history does not drag them towards zero.
+    """
+    df = frame(rows)
+    bars = df["price"].resample(freq).ohlc()
+    # Buckets with only ge_price samples fall back to the price range; wicks always cover open and close.
+    high = df["high"].resample(freq).max().fillna(bars["high"])
+    low = df["low"].resample(freq).min().fillna(bars["low"])
+    bars["high"] = np.fmax(high, np.fmax(bars["open"], bars["close"]))
+    bars["low"] = np.fmin(low, np.fmin(bars["open"], bars["close"]))
+    bars["volume"] = df["volume"].resample(freq).mean()
+    bars = bars[bars["close"].notna()]
+    close = bars["close"]
+    return bars.assign(**{f"ma_{window}": close.rolling(window, min_periods=1).mean() for window in windows})
+
+
+def _fmt(value) -> str:
+    return "-" if value != value else f"{value:,.0f}"
+
+
+def candle_table(title: str, candles: pd.DataFrame) -> Table:
+    """Renders candles() output as a table, one row per bucket, for both CLIs"""
+    table = Table(title=title)
+    table.add_column("Day", style="cyan")
+    table.add_column("Open", justify="right")
+    table.add_column("High", justify="right", style="green")
+    table.add_column("Low", justify="right", style="red")
+    table.add_column("Close", justify="right", style="bold")
+    table.add_column("MA 7", justify="right", style="yellow")
+    table.add_column("MA 30", justify="right", style="yellow")
+    table.add_column("Volume", justify="right")
+
+    for day, row in zip(candles.index, candles.itertuples(index=False)):
+        table.add_row(
+            day.strftime("%Y-%m-%d"), _fmt(row.open), _fmt(row.high), _fmt(row.low), _fmt(row.close),
+            _fmt(row.ma_7), _fmt(row.ma_30), _fmt(row.volume),
+        )
+    return table
+
+
+def spread(game: str, item_id: int, days: int = SPREAD_DAYS) -> Optional[dict]:
+    """Estimates what an item buys and sells for from its recent history, or None without high/low data.
+
+    Buy is the median of the low prices and sell the median of the high
+    prices over the last days, which smooths out single spikes.
+    """
+    rows = open_history(game).history(item_id, start=int(time.time()) - days * 86400)
+    if not rows:
+        return None
+    df = frame(rows)
+    highs, lows = df["high"].dropna(), df["low"].dropna()
+    if highs.empty or lows.empty:
+        return None
+    return {"buy": float(lows.median()), "sell": float(highs.median()),
+            "samples": int(min(len(highs), len(lows))), "days": days}
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+from rich.table import Table
+
+from fetchers import osrs_api, rs3_api
+from fetchers.osrs_mapping import get_mapping
+
+NATURE_RUNE_ID = 561  # consumed by every high alchemy cast, in both games
+
+RANK_COLUMNS = {
+    "flip": "flip_profit",
+    "alch": "alch_profit",
+    "roi": "roi",
+}
+
+
+def score(frame: pd.DataFrame, nature_price: float) -> pd.DataFrame:
+    """Adds margin, spread, ROI and buy-limit-capped profit columns in one vectorized pass.
+
+    Expects id, name, high, low, highalch and limit columns; missing prices are NaN.
+    """
+    high = frame["high"].to_numpy(dtype="float64")
+    low = frame["low"].to_numpy(dtype="float64")
+    highalch = frame["highalch"].to_numpy(dtype="float64")
+    limit = frame["limit"].to_numpy(dtype="float64")
+
+    spread = high - low
+    alch_margin = highalch - high - nature_price
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(low > 0, spread / low, np.nan)
+
+    return frame.assign(
+        spread=spread,
+        roi=roi,
+        alch_margin=alch_margin,
+        flip_profit=spread * limit,
+        alch_profit=alch_margin * limit,
+    )
+
+
+def _frame(latest: dict, ids, names, highalch, limit) -> pd.DataFrame:
+    prices = pd.DataFrame.from_dict(latest, orient="index", columns=["high", "low"])
+    prices.index = prices.index.astype("int64")
+
+    meta = pd.DataFrame(
+        {"name": names, "highalch": highalch, "limit": limit},
+        index=pd.Index(ids, dtype="int64", name="id"),
+    )
+    return meta.join(prices, how="inner").reset_index()
+
+
+def _rank(frame: pd.DataFrame, nature_price: float, by: str, top: int) -> pd.DataFrame:
+    scored = score(frame, nature_price)
+    column = RANK_COLUMNS[by]
+    return scored.dropna(subset=[column]).nlargest(top, column)
+
+
+def scan_osrs(by: str = "flip", top: int = 20) -> pd.DataFrame:
+    """Ranks every OSRS item from one /latest call and the cached mapping"""
+    latest = osrs_api.fetch_all_latest()
+    entries = list(get_mapping().values())
+    frame = _frame(
+        latest,
+        [entry.id for entry in entries],
+        [entry.name for entry in entries],
+        [entry.highalch for entry in entries],
+        [entry.limit for entry in entries],
+    )
+    nature_price = (latest.get(str(NATURE_RUNE_ID)) or {}).get("high") or 0
+    return _rank(frame, nature_price, by, top)
+
+
+def scan_rs3(by: str = "flip", top: int = 20) -> pd.DataFrame:
+    """Ranks every RS3 item from one /latest call and one /mapping call"""
+    latest = rs3_api.fetch_all_latest()
+    entries = list(rs3_api.fetch_mapping().values())
+    frame = _frame(
+        latest,
+        [entry["id"] for entry in entries],
+        [entry["name"] for entry in entries],
+        [entry.get("highalch") for entry in entries],
+        [entry.get("limit") for entry in entries],
+    )
+    nature_price = (latest.get(str(NATURE_RUNE_ID)) or {}).get("high") or 0
+    return _rank(frame, nature_price, by, top)
+
+
+def _fmt(value, spec=",.0f") -> str:
+    return "-" if value is None or value != value else format(value, spec)
+
+
+def results_table(title: str, results: pd.DataFrame) -> Table:
+    """Renders scan_osrs()/scan_rs3() output as a table for both CLIs"""
+    table = Table(title=title)
+    table.add_column("ID", justify="right", style="cyan")
+    table.add_column("Name", style="bold")
+    table.add_column("Low", justify="right", style="red")
+    table.add_column("High", justify="right", style="green")
+    table.add_column("Spread", justify="right")
+    table.add_column("ROI", justify="right")
+    table.add_column("Limit", justify="right")
+    table.add_column("Flip Profit", justify="right", style="yellow")
+    table.add_column("Alch Margin", justify="right", style="magenta")
+    table.add_column("Alch Profit", justify="right", style="magenta")
+
+    for row in results.itertuples():
+        table.add_row(
+            str(row.id), row.name, _fmt(row.low), _fmt(row.high), _fmt(row.spread), _fmt(row.roi, ".1%"),
+            _fmt(row.limit), _fmt(row.flip_profit), _fmt(row.alch_margin), _fmt(row.alch_profit),
+        )
+    return table
@@ -0,0 +1,213 @@
+import csv
+import itertools
+import json
+import os
+
+from fetchers import rs3_api
+from fetchers.item_lookup import cached_item, get_item, resolve_id, resolve_name
+from fetchers.osrs_mapping import get_mapping
+from fetchers.pool import fetch_all, host_of
+from fetchers.rs3_scraper import BASE_URL as EXCHANGE_URL
+from fetchers.search_index import normalize
+from storage import osrs_watchlist, rs3_watchlist
+from storage.price_history import open_history
+
+RS3_EXPORT_COLUMNS = ["id", "name", "ge_price", "high_alch", "low_alch", "store_price", "buy_limit", "volume",
+                      "last_updated", "url"]
+OSRS_EXPORT_COLUMNS = ["id", "name", "high", "low", "highalch", "limit", "last_updated"]
+
+
+def _item_id(value):
+    """An ID from a file as an int, whether it was written as 562 or "562"; anything else is None"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+
+def read_entries(path):
+    """Yields (item_id or None, name or None) from a CSV, JSON or newline-separated file"""
+    ext = os.path.splitext(path)[1].lower()
+
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if ext == ".json":
+            for entry in json.load(f):
+                if isinstance(entry, dict):
+                    yield _item_id(entry.get("id")), entry.get("name")
+                elif isinstance(entry, int):
+                    yield entry, None
+                else:
+                    yield None, str(entry)
+        elif ext == ".csv":
+            rows = csv.reader(f)
+            first = next(rows, [])
+            header = [col.strip().lower() for col in first]
+            if "name" in header or "id" in header:
+                name_col = header.index("name") if "name" in header else None
+                id_col = header.index("id") if "id" in header else None
+            else:
+                # No header row: the first column holds names.
+                name_col, id_col = 0, None
+                rows = itertools.chain([first], rows)
+            for row in rows:
+                item_id = row[id_col].strip() if id_col is not None and id_col < len(row) else ""
+                name = row[name_col].strip() if name_col is not None and name_col < len(row) else ""
+                yield _item_id(item_id), (name or None)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield None, line
+
+
+def _mismatch(item_id, name, actual):
+    return f"ID {item_id} is {actual}, not {name}"
+
+
+def import_rs3(path):
+    """Adds every entry in path to the RS3 watchlist with one write.
+
+    Names are resolved against the local index/mapping first; only the rest
+    are looked up on the wiki, concurrently. Bare IDs take their name from local
+    data or, failing that, one prices API /mapping request, and entries with both
+    an ID and a name must agree on the item. Returns (added, skipped, failed
+    names with unknown IDs as "ID n", mismatched ID/name pairs).
+    """
+    resolved = {}
+    unresolved = []
+    mismatched = []
+    bare_ids = {}  # ID -> name the file gave it, or None
+    for item_id, name in read_entries(path):
+        if item_id:
+            known = resolve_name(item_id)
+            match = resolve_id(name) if name and not known else None
+            if known and name and normalize(name) != normalize(known):
+                mismatched.append(_mismatch(item_id, name, known))
+            elif match and match[0] != item_id:
+                mismatched.append(f"{name} is ID {match[0]}, not {item_id}")
+            elif known or match:
+                resolved[item_id] = known or match[1]
+            else:
+                bare_ids.setdefault(item_id, name)
+            continue
+        if not name:
+            continue
+        match = resolve_id(name)
+        if match:
+            resolved[match[0]] = match[1]
+        else:
+            unresolved.append(name)
+
+    failed = []
+    if bare_ids:
+        mapping = rs3_api.fetch_mapping()
+        for item_id, name in bare_ids.items():
+            if item_id not in mapping:
+                failed.append(f"ID {item_id}")
+            elif name and normalize(name) != normalize(mapping[item_id]["name"]):
+                mismatched.append(_mismatch(item_id, name, mapping[item_id]["name"]))
+            else:
+                resolved[item_id] = mapping[item_id]["name"]
+
+    for name, data, error in fetch_all(dict.fromkeys(unresolved), get_item, host=host_of(EXCHANGE_URL)):
+        if error or not data.get("item_id"):
+            failed.append(name)
+        else:
+            resolved[data["item_id"]] = data["name"]
+
+    added = skipped = 0
+    with rs3_watchlist.batch():
+        for item_id, name in resolved.items():
+            if rs3_watchlist.get_item(item_id):
+                skipped += 1
+            else:
+                rs3_watchlist.add_item(item_id, name)
+                added += 1
+    return added, skipped, failed, mismatched
+
+
+def import_osrs(path):
+    """Adds every entry in path to the OSRS watchlist with one write; resolution is fully local.
+
+    Returns (added, skipped, failed names or IDs, mismatched ID/name pairs).
+    """
+    mapping = get_mapping()
+    ids = []
+    failed = []
+    mismatched = []
+    for item_id, name in read_entries(path):
+        if item_id is None and not name:
+            continue
+        entry = mapping.get(item_id) if item_id is not None else None
+        if entry and name and normalize(name) != normalize(entry.name):
+            mismatched.append(_mismatch(item_id, name, entry.name))
+        elif entry:
+            ids.append(item_id)
+        elif name and mapping.by_name(name) and item_id is None:
+            ids.append(mapping.by_name(name).id)
+        else:
+            failed.append(f"ID {item_id}" if item_id is not None else name)
+
+    existing = set(osrs_watchlist.load_watchlist())
+    new_ids = [item_id for item_id in dict.fromkeys(ids) if item_id not in existing]
+    with osrs_watchlist.batch():
+        for item_id in new_ids:
+            osrs_watchlist.add_item(item_id)
+    return len(new_ids), len(ids) - len(new_ids), failed, mismatched
+
+
+def _rs3_rows():
+    history = open_history("rs3")
+    for entry in rs3_watchlist.load_watchlist():
+        data = cached_item(item_id=entry["id"]) or {}
+        if not data:
+            latest = history.latest(entry["id"]) or {}
+            data = {"ge_price": latest.get("ge_price"), "volume": latest.get("volume")}
+        row = dict(data, id=entry["id"], name=entry["name"])
+        yield [row.get(column) for column in RS3_EXPORT_COLUMNS]
+
+
+def _osrs_rows():
+    history = open_history("osrs")
+    mapping = get_mapping()
+    for item_id in osrs_watchlist.load_watchlist():
+        entry = mapping.get(item_id)
+        latest = history.latest(item_id) or {}
+        yield [
+            item_id,
+            entry.name if entry else None,
+            latest.get("high"),
+            latest.get("low"),
+            entry.highalch if entry else None,
+            entry.limit if entry else None,
+            latest.get("timestamp"),
+        ]
+
+
+def _write_rows(path, columns, rows):
+    if path.lower().endswith(".xlsx"):
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Watchlist")
+        sheet.append(columns)
+        for row in rows:
+            sheet.append(row)
+        workbook.save(path)
+        return
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def export_rs3(path):
+    """Streams the RS3 watchlist with its last cached prices to .csv or .xlsx"""
+    _write_rows(path, RS3_EXPORT_COLUMNS, _rs3_rows())
+
+
+def export_osrs(path):
+    """Streams the OSRS watchlist with its last recorded prices to .csv or .xlsx"""
+    _write_rows(path, OSRS_EXPORT_COLUMNS, _osrs_rows())
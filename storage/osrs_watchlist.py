@@ -1,30 +1,21 @@
-import json
-import os
+from storage.watchlist_store import WatchlistStore
 
 WATCHLIST_FILE = "osrs_watchlist.json"
 
-def load_watchlist() -> list[int]:
-    if not os.path.exists(WATCHLIST_FILE):
-        return []
+_store = WatchlistStore(WATCHLIST_FILE, key=lambda item_id: item_id)
 
-    with open(WATCHLIST_FILE, "r", encoding="utf-8") as f:
-        try:
-            return json.load(f)
-        except Exception:
-            return []
+def load_watchlist() -> list[int]:
+    return _store.entries()
 
 def save_watchlist(item_ids: list[int]) -> None:
-    with open(WATCHLIST_FILE, "w", encoding="utf-8") as f:
-        json.dump(item_ids, f, indent=2)
+    _store.replace(item_ids)
+
+def batch():
+    """Context manager that applies several add/remove calls with a single write"""
+    return _store.batch()
 
 def add_item(item_id: int) -> None:
-    watchlist = load_watchlist()
-    if item_id not in watchlist:
-        watchlist.append(item_id)
-        save_watchlist(watchlist)
+    _store.add(item_id)
 
 def remove_item(item_id: int) -> None:
-    watchlist = load_watchlist()
-    if item_id in watchlist:
-        watchlist.remove(item_id)
-        save_watchlist(watchlist)
+    _store.remove(item_id)
@@ -0,0 +1,165 @@
+import atexit
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from fetchers import metrics
+
+DB_FILE = "{game}_price_history.db"
+BATCH_SIZE = 200  # buffered observations per executemany
+
+BUCKETS = {
+    "hourly": 3600,
+    "daily": 86400,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    item_id   INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    high      INTEGER,
+    low       INTEGER,
+    ge_price  INTEGER,
+    volume    INTEGER,
+    PRIMARY KEY (item_id, timestamp)
+) WITHOUT ROWID
+"""
+
+# How far each item's API timeseries has been stored, per timestep, so a backfill resumes where it stopped.
+BACKFILL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS backfill (
+    item_id  INTEGER NOT NULL,
+    timestep TEXT NOT NULL,
+    until    INTEGER NOT NULL,
+    PRIMARY KEY (item_id, timestep)
+) WITHOUT ROWID
+"""
+
+COLUMNS = ("item_id", "timestamp", "high", "low", "ge_price", "volume")
+
+
+class PriceHistory:
+    """SQLite-backed store of every price observation for one game"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = []
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.execute(BACKFILL_SCHEMA)
+        self._conn.commit()
+
+    def record(self, item_id: int, high=None, low=None, ge_price=None, volume=None,
+               timestamp: Optional[int] = None) -> None:
+        """Buffers one observation; the buffer is written in a single transaction every BATCH_SIZE rows"""
+        row = (item_id, int(timestamp if timestamp is not None else time.time()), high, low, ge_price, volume)
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= BATCH_SIZE:
+                self._flush_locked()
+
+    def record_many(self, rows) -> None:
+        """Buffers (item_id, timestamp, high, low, ge_price, volume) tuples"""
+        with self._lock:
+            self._pending.extend(rows)
+            if len(self._pending) >= BATCH_SIZE:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        with metrics.span("db.write"), self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?, ?, ?)", self._pending
+            )
+        self._pending = []
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _query(self, sql, params):
+        with self._lock:
+            self._flush_locked()
+            with metrics.span("db.read"):
+                return self._conn.execute(sql, params).fetchall()
+
+    def history(self, item_id: int, start: Optional[int] = None, end: Optional[int] = None) -> list[dict]:
+        """Returns observations for item_id between start and end (unix seconds), oldest first"""
+        rows = self._query(
+            "SELECT * FROM observations WHERE item_id = ? AND timestamp BETWEEN ? AND ? ORDER BY timestamp",
+            (item_id, start or 0, end if end is not None else 2 ** 62),
+        )
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def latest(self, item_id: int) -> Optional[dict]:
+        rows = self._query(
+            "SELECT * FROM observations WHERE item_id = ? ORDER BY timestamp DESC LIMIT 1", (item_id,)
+        )
+        return dict(zip(COLUMNS, rows[0])) if rows else None
+
+    def last_timestamp(self, item_id: int) -> Optional[int]:
+        rows = self._query("SELECT MAX(timestamp) FROM observations WHERE item_id = ?", (item_id,))
+        return rows[0][0]
+
+    def backfilled_until(self, item_id: int, timestep: str) -> Optional[int]:
+        """Returns the timestamp of the newest timeseries point stored for item_id at this step, if any"""
+        rows = self._query("SELECT until FROM backfill WHERE item_id = ? AND timestep = ?", (item_id, timestep))
+        return rows[0][0] if rows else None
+
+    def mark_backfilled(self, item_id: int, timestep: str, until: int) -> None:
+        """Moves item_id's backfill marker to until, writing any buffered observations first"""
+        with self._lock:
+            self._flush_locked()
+            with metrics.span("db.write"), self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO backfill VALUES (?, ?, ?)", (item_id, timestep, until))
+
+    def rollup(self, item_id: int, bucket: str = "daily", start: Optional[int] = None,
+               end: Optional[int] = None) -> list[dict]:
+        """Returns per-bucket min/avg/max of each price column, oldest bucket first"""
+        size = BUCKETS[bucket]
+        rows = self._query(
+            """
+            SELECT (timestamp / :size) * :size AS bucket, COUNT(*),
+                   MIN(ge_price), AVG(ge_price), MAX(ge_price),
+                   MIN(low), AVG(low), MAX(high), AVG(high),
+                   AVG(volume)
+            FROM observations
+            WHERE item_id = :item_id AND timestamp BETWEEN :start AND :end
+            GROUP BY bucket ORDER BY bucket
+            """,
+            {"size": size, "item_id": item_id, "start": start or 0, "end": end if end is not None else 2 ** 62},
+        )
+        keys = ("bucket", "samples", "ge_min", "ge_avg", "ge_max", "low_min", "low_avg", "high_max", "high_avg",
+                "volume_avg")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_history(game: str) -> PriceHistory:
+    """Returns the shared PriceHistory for 'rs3' or 'osrs'"""
+    with _stores_lock:
+        if game not in _stores:
+            _stores[game] = PriceHistory(DB_FILE.format(game=game))
+        return _stores[game]
+
+
+@atexit.register
+def _flush_all():
+    for store in list(_stores.values()):
+        try:
+            store.flush()
+        except sqlite3.Error:
+            pass
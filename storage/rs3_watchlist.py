@@ -1,25 +1,31 @@
-import json
-import os
+from storage.watchlist_store import WatchlistStore
 
 WATCHLIST_FILE = "rs3_watchlist.json"
 
+_store = WatchlistStore(WATCHLIST_FILE, key=lambda entry: entry["id"])
+
 def load_watchlist():
-    if not os.path.exists(WATCHLIST_FILE):
-        return []
-    with open(WATCHLIST_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return _store.entries()
 
 def save_watchlist(data: list[dict]):
-    with open(WATCHLIST_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    _store.replace(data)
+
+def get_item(item_id: int):
+    return _store.get(item_id)
+
+def batch():
+    """Context manager that applies several add/remove calls with a single write"""
+    return _store.batch()
 
 def add_item(item_id: int, name: str):
-    watchlist = load_watchlist()
-    if not any(entry["id"] == item_id for entry in watchlist):
-        watchlist.append({"id": item_id, "name": name})
-        save_watchlist(watchlist)
+    _store.add({"id": item_id, "name": name})
 
 def remove_item(item_id: int):
-    watchlist = load_watchlist()
-    watchlist = [item for item in watchlist if item["id"] != item_id]
-    save_watchlist(watchlist)
+    _store.remove(item_id)
+
+def replace_item(item_id: int, new_id: int, name: str):
+    """Swaps an entry for a corrected one in a single write, keeping any other fields it carries"""
+    with _store.batch():
+        entry = _store.get(item_id) or {}
+        _store.remove(item_id)
+        _store.add(dict(entry, id=new_id, name=name))
@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+from fetchers import metrics
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class WatchlistStore:
+    """Id-keyed watchlist kept in memory and written through atomically under a file lock.
+
+    Reads reuse the in-memory copy until another process changes the file.
+    Mutations re-read a changed file under the lock, so the CLI and the daemon
+    never overwrite each other's edits, and a batch() writes once at the end.
+    """
+
+    def __init__(self, path, key):
+        self.path = path
+        self._key = key
+        self._entries = {}
+        self._signature = None
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._dirty = False
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _reload_if_changed(self):
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+
+        entries = []
+        if signature is not None:
+            with metrics.span("cache.watchlist.read"), open(self.path, "r", encoding="utf-8") as f:
+                try:
+                    entries = json.load(f)
+                except ValueError:
+                    entries = []
+        self._entries = {self._key(entry): entry for entry in entries}
+        self._signature = signature
+
+    @metrics.timed("cache.watchlist.write")
+    def _write(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(self._entries.values()), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._signature = self._file_signature()
+
+    @contextmanager
+    def batch(self):
+        """Groups mutations into one locked read-modify-write"""
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self
+                finally:
+                    self._depth -= 1
+                return
+
+            with open(self.path + ".lock", "a+") as lock_file:
+                _lock_file(lock_file)
+                try:
+                    self._depth = 1
+                    self._reload_if_changed()
+                    try:
+                        yield self
+                    except BaseException:
+                        self._signature = None  # drop half-applied changes on the next read
+                        raise
+                    if self._dirty:
+                        self._write()
+                finally:
+                    self._depth = 0
+                    self._dirty = False
+                    _unlock_file(lock_file)
+
+    def entries(self) -> list:
+        with self._lock:
+            if not self._depth:
+                self._reload_if_changed()
+            return list(self._entries.values())
+
+    def get(self, item_id):
+        with self._lock:
+            if not self._depth:
+                self._reload_if_changed()
+            return self._entries.get(item_id)
+
+    def __contains__(self, item_id):
+        return self.get(item_id) is not None
+
+    def add(self, entry) -> bool:
+        """Adds entry unless its id is already present; returns whether it was added"""
+        with self.batch():
+            item_id = self._key(entry)
+            if item_id in self._entries:
+                return False
+            self._entries[item_id] = entry
+            self._dirty = True
+            return True
+
+    def remove(self, item_id) -> bool:
+        with self.batch():
+            if self._entries.pop(item_id, None) is None:
+                return False
+            self._dirty = True
+            return True
+
+    def replace(self, entries) -> None:
+        with self.batch():
+            self._entries = {self._key(entry): entry for entry in entries}
+            self._dirty = True
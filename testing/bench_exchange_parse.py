@@ -0,0 +1,95 @@
+import glob
+import os
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+from rich.console import Console
+from rich.table import Table
+
+from fetchers.rs3_scraper import parse_exchange_page
+
+console = Console()
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "exchange")
+SAMPLES = os.path.join(os.path.dirname(__file__), "samples", "exchange")  # hand-written, used until pages are recorded
+ROUNDS = 50
+
+
+def parse_with_soup(page_html, item_name, url):
+    """The previous extraction path: a full BeautifulSoup tree and one find() per field."""
+    soup = BeautifulSoup(page_html, "lxml")
+
+    def get_by_id(element_id):
+        tag = soup.find(id=element_id)
+        if tag:
+            return tag.get_text(strip=True).replace(",", "")
+        return None
+
+    def to_int(val):
+        return int(val) if val and val.isdigit() else None
+
+    return {
+        "name": item_name,
+        "ge_price": to_int(get_by_id("GEPrice")),
+        "high_alch": to_int(get_by_id("exchange-highalch")),
+        "low_alch": to_int(get_by_id("exchange-lowalch")),
+        "store_price": to_int(get_by_id("exchange-value")),
+        "buy_limit": to_int(get_by_id("exchange-limit")),
+        "volume": to_int(get_by_id("GEVolume")),
+        "item_id": to_int(get_by_id("exchange-itemid")),
+        "url": url,
+    }
+
+
+def measure(parse, page_html):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        parse(page_html, "item", "url")
+    elapsed = (time.perf_counter() - start) / ROUNDS
+
+    tracemalloc.start()
+    parse(page_html, "item", "url")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    table = Table(
+        title=f"Exchange page parse ({ROUNDS} rounds per page)",
+        caption="Peak memory is the Python heap (tracemalloc); libxml2's own C allocations are not traced.",
+    )
+    table.add_column("Fixture", style="bold")
+    table.add_column("Size", justify="right")
+    table.add_column("soup ms", justify="right", style="red")
+    table.add_column("lxml ms", justify="right", style="green")
+    table.add_column("Speedup", justify="right")
+    table.add_column("soup peak KB", justify="right", style="red")
+    table.add_column("lxml peak KB", justify="right", style="green")
+
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))) or sorted(glob.glob(os.path.join(SAMPLES, "*.html"))):
+        with open(path, "rb") as f:
+            page_html = f.read()
+
+        old, new = parse_with_soup(page_html, "item", "url"), parse_exchange_page(page_html, "item", "url")
+        new.pop("last_updated")
+        if old != new:
+            console.print(f"[red]Output mismatch on {path}: {old} != {new}[/red]")
+
+        soup_time, soup_peak = measure(parse_with_soup, page_html)
+        lxml_time, lxml_peak = measure(parse_exchange_page, page_html)
+        table.add_row(
+            os.path.basename(path),
+            f"{len(page_html) // 1024} KB",
+            f"{soup_time * 1000:.2f}",
+            f"{lxml_time * 1000:.2f}",
+            f"{soup_time / lxml_time:.1f}x",
+            f"{soup_peak // 1024:,}",
+            f"{lxml_peak // 1024:,}",
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
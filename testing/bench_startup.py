@@ -0,0 +1,90 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUNDS = 10
+TARGET_MS = 200  # first paint of the menu, median, from source on a warm disk cache
+MENU_READY = b"[E] Exit"
+
+# Modules that must not be loaded before the user asks for a feature that needs them.
+DEFERRED = ["bs4", "lxml", "requests", "numpy", "pandas", "openpyxl", "asyncio"]
+
+
+def first_paint(command) -> float:
+    """Seconds from process start until the menu's last line is on stdout"""
+    started = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, env=dict(os.environ, TERM="dumb"))
+    output = b""
+    try:
+        while MENU_READY not in output:
+            chunk = proc.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError(f"{command[-1]} exited before showing the menu")
+            output += chunk
+        return time.perf_counter() - started
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def loaded_modules(script) -> str:
+    """Runs script until its menu asks for input and lists which DEFERRED modules it had imported"""
+    probe = (
+        "import builtins, runpy, sys\n"
+        "def stop(*args):\n"
+        f"    print(','.join(m for m in {DEFERRED!r} if m in sys.modules) or '-')\n"
+        "    sys.exit(0)\n"
+        "builtins.input = stop\n"
+        f"sys.argv = [{script!r}]\n"
+        f"runpy.run_path({script!r}, run_name='__main__')\n"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True)
+    lines = result.stdout.strip().splitlines()
+    return lines[-1] if lines else "?"
+
+
+def main():
+    # Pass the path of a frozen build (e.g. dist/rs3_watch/rs3_watch) to time that instead.
+    targets = [[path] for path in sys.argv[1:]] or [
+        [sys.executable, os.path.join(ROOT, "rs3_watch.py")],
+        [sys.executable, os.path.join(ROOT, "osrs_watch.py")],
+    ]
+
+    table = Table(title=f"Startup to first menu paint ({ROUNDS} runs, target {TARGET_MS} ms median)")
+    table.add_column("Program", style="bold")
+    table.add_column("min ms", justify="right")
+    table.add_column("median ms", justify="right")
+    table.add_column("max ms", justify="right")
+    table.add_column("Heavy modules loaded", style="dim")
+    table.add_column("Result")
+
+    failed = False
+    for command in targets:
+        first_paint(command)  # warm the disk cache
+        times = [first_paint(command) * 1000 for _ in range(ROUNDS)]
+        median = statistics.median(times)
+        ok = median <= TARGET_MS
+        failed |= not ok
+        table.add_row(
+            os.path.basename(command[-1]),
+            f"{min(times):.0f}",
+            f"{median:.0f}",
+            f"{max(times):.0f}",
+            loaded_modules(command[-1]) if command[0] == sys.executable else "-",
+            "[green]ok[/green]" if ok else "[red]over target[/red]",
+        )
+
+    console.print(table)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from rich.console import Console
+from rich.table import Table
+
+from fetchers import index_store, item_lookup, osrs_api, osrs_mapping, rs3_index, transport
+from fetchers.pool import fetch_all, host_of
+from fetchers.rs3_scraper import parse_exchange_page
+from services import backfill, ohlc
+from storage.price_history import open_history
+from testing.stub_wiki import StubWiki
+
+console = Console()
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FILE = os.path.join(os.path.dirname(__file__), "bench_results.jsonl")
+
+ROUNDS = 20
+WATCHLIST_SIZE = 50
+REGRESSION = 0.15  # p50 slower than the previous stored run by more than this is flagged
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+class Bench:
+    """One hot path: setup() runs untimed before every round, run() is timed and returns its operation count"""
+
+    def __init__(self, name, run, setup=None, rounds=ROUNDS):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: None)
+        self.rounds = rounds
+
+    def measure(self) -> dict:
+        self.setup()
+        self.run()  # warm-up
+
+        latencies, ops = [], 0
+        for _ in range(self.rounds):
+            self.setup()
+            started = time.perf_counter()
+            ops += self.run()
+            latencies.append(time.perf_counter() - started)
+
+        self.setup()
+        tracemalloc.start()
+        self.run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {
+            "rounds": self.rounds,
+            "ops_per_round": ops // self.rounds,
+            "throughput": ops / sum(latencies),
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p90_ms": percentile(latencies, 90) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "peak_kb": peak // 1024,
+        }
+
+
+def build_benches(stub):
+    state = {}
+
+    def drop_index():
+        if os.path.exists(rs3_index.CACHE_FILE):
+            os.remove(rs3_index.CACHE_FILE)
+
+    def index_build():
+        state["store"] = rs3_index._refresh(log=rs3_index._quiet_console)
+        state["names"] = [item["name"] for item in state["store"].items()]
+        return len(rs3_index.INDEX_SKILLS)
+
+    def index_refresh_unchanged():
+        rs3_index._refresh(state["store"], log=rs3_index._quiet_console)
+        return len(rs3_index.INDEX_SKILLS)
+
+    def cache_load():
+        snapshot = rs3_index.MarketIndex(index_store.load(rs3_index.CACHE_FILE))
+        return len(snapshot.items)
+
+    def search_index_build():
+        state["search"] = rs3_index.MarketIndex(index_store.load(rs3_index.CACHE_FILE)).search_index
+        return 1
+
+    def search_terms():
+        # Exact names, prefixes, inner fragments and one-letter typos (which fall through to fuzzy matching).
+        names = state["names"][::50]
+        state["terms"] = [term for name in names for term in (name, name[:4], name.lower()[2:9], name[:-1] + "x")]
+
+    def search():
+        for term in state["terms"]:
+            state["search"].search(term)
+        return len(state["terms"])
+
+    def exchange_parse():
+        for page_html in stub.exchange:
+            parse_exchange_page(page_html, "item", "url")
+        return len(stub.exchange)
+
+    def reset_lookup_cache():
+        item_lookup._cache = None
+        item_lookup._ids.clear()
+        if os.path.exists(item_lookup.CACHE_FILE):
+            os.remove(item_lookup.CACHE_FILE)
+
+    def watchlist_refresh():
+        names = state["names"][:WATCHLIST_SIZE]
+        results = fetch_all(names, lambda name: item_lookup.get_item(name, max_age=0), host=host_of(stub.url))
+        failures = [name for name, _, error in results if error]
+        if failures:
+            raise RuntimeError(f"{len(failures)} Exchange lookups failed, e.g. {failures[0]}")
+        return len(names)
+
+    def reset_latest():
+        osrs_api._latest_cache["timestamp"] = 0.0
+
+    def osrs_latest():
+        return len(osrs_api.fetch_latest_many(range(2, 2 + WATCHLIST_SIZE)))
+
+    def reset_backfill():
+        history = open_history("osrs")
+        with history._lock, history._conn:
+            history._conn.execute("DELETE FROM backfill")
+
+    def history_backfill():
+        stored, _, failed = backfill.backfill("osrs", range(2, 2 + WATCHLIST_SIZE))
+        if failed:
+            raise RuntimeError(f"{len(failed)} timeseries requests failed, e.g. ID {failed[0]}")
+        return WATCHLIST_SIZE
+
+    def ensure_history():
+        backfill.backfill("osrs", range(2, 2 + WATCHLIST_SIZE))  # a no-op once the items are up to date
+
+    def candles():
+        history = open_history("osrs")
+        for item_id in range(2, 2 + WATCHLIST_SIZE):
+            ohlc.candles(history.history(item_id))
+        return WATCHLIST_SIZE
+
+    def ensure_mapping():
+        if not os.path.exists(osrs_mapping.CACHE_FILE):
+            osrs_mapping._download()
+
+    def mapping_load():
+        return len(osrs_mapping._load_cache())
+
+    # Later benchmarks read the index and its names, so build it once up front; this also lets --only pick any of them.
+    drop_index()
+    index_build()
+
+    return [
+        Bench("index build (cold)", index_build, setup=drop_index, rounds=5),
+        Bench("index refresh (304s)", index_refresh_unchanged, rounds=5),
+        Bench("index cache load", cache_load),
+        Bench("search index build", search_index_build, rounds=5),
+        Bench("search", search, setup=search_terms),
+        Bench("exchange parse", exchange_parse),
+        Bench(f"watchlist refresh ({WATCHLIST_SIZE})", watchlist_refresh, setup=reset_lookup_cache, rounds=5),
+        Bench("osrs /latest", osrs_latest, setup=reset_latest),
+        Bench("osrs mapping load", mapping_load, setup=ensure_mapping),
+        Bench(f"history backfill ({WATCHLIST_SIZE})", history_backfill, setup=reset_backfill, rounds=5),
+        Bench(f"ohlc candles ({WATCHLIST_SIZE})", candles, setup=ensure_history),
+    ]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _machine():
+    return f"{platform.system()} {platform.machine()} x{os.cpu_count()}"
+
+
+def _previous_run(latency, server_limit):
+    if not os.path.exists(RESULTS_FILE):
+        return None
+    with open(RESULTS_FILE, "r", encoding="utf-8") as f:
+        runs = [json.loads(line) for line in f if line.strip()]
+    runs = [run for run in runs if run.get("latency_ms") == latency and run.get("machine") == _machine()
+            and run.get("server_limit", 0) == server_limit]
+    return runs[-1] if runs else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the watcher's hot paths against a stub wiki")
+    parser.add_argument("--latency", type=float, default=20, help="simulated network latency per request, in ms")
+    parser.add_argument("--server-limit", type=int, default=0,
+                        help="requests per second the stub allows before answering 429 (0: unlimited)")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this text")
+    parser.add_argument("--no-save", action="store_true", help=f"do not append the results to {os.path.basename(RESULTS_FILE)}")
+    args = parser.parse_args()
+
+    stub = StubWiki(latency=args.latency / 1000, rate_limit=args.server_limit).start()
+    previous = _previous_run(args.latency, args.server_limit)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        stub.install(cache_dir)
+        transport.reset_stats()
+        for bench in build_benches(stub):
+            if args.only and args.only not in bench.name:
+                continue
+            console.print(f"[cyan]Running {bench.name}...[/cyan]")
+            results[bench.name] = bench.measure()
+    stub.stop()
+
+    table = Table(title=f"Offline benchmarks ({stub.source} fixtures, {args.latency:g} ms simulated latency)",
+                  caption="Peak memory is the Python heap (tracemalloc) during one extra round.")
+    table.add_column("Benchmark", style="bold")
+    table.add_column("ops/round", justify="right")
+    table.add_column("ops/s", justify="right")
+    table.add_column("p50 ms", justify="right", style="green")
+    table.add_column("p90 ms", justify="right")
+    table.add_column("p99 ms", justify="right")
+    table.add_column("peak KB", justify="right")
+    table.add_column("vs last p50", justify="right")
+
+    for name, result in results.items():
+        change = "-"
+        if previous and name in previous["results"]:
+            before = previous["results"][name]["p50_ms"]
+            ratio = result["p50_ms"] / before - 1 if before else 0
+            style = "red" if ratio > REGRESSION else "green" if ratio < -REGRESSION else "dim"
+            change = f"[{style}]{ratio:+.0%}[/{style}]"
+        table.add_row(
+            name,
+            f"{result['ops_per_round']:,}",
+            f"{result['throughput']:,.0f}",
+            f"{result['p50_ms']:.2f}",
+            f"{result['p90_ms']:.2f}",
+            f"{result['p99_ms']:.2f}",
+            f"{result['peak_kb']:,}",
+            change,
+        )
+
+    console.print(table)
+    stats = transport.stats()
+    console.print(f"{stub.requests:,} stub requests, {stub.throttled:,} answered 429, "
+                  f"{stats['connections']:,} connections opened, {stats['retries']:,} retries")
+    if previous:
+        console.print(f"Compared with {previous.get('commit') or 'unknown commit'} from {previous['date']}.", style="dim")
+
+    if not args.no_save:
+        run = {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "machine": _machine(),
+            "python": platform.python_version(),
+            "fixtures": stub.source,
+            "latency_ms": args.latency,
+            "server_limit": args.server_limit,
+            "results": results,
+        }
+        with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import collections
+import glob
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from fetchers import item_lookup, osrs_api, osrs_mapping, rs3_api, rs3_index, rs3_scraper, transport
+from storage import price_history, rs3_watchlist
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+SAMPLES = os.path.join(os.path.dirname(__file__), "samples")  # hand-written Exchange pages, used until some are recorded
+SEED = 2024
+
+INDEX_PATH = "/w/RuneScape:Grand_Exchange_Market_Watch/"
+EXCHANGE_PATH = "/w/Exchange:"
+API_PATH = "/api/v1/"
+
+ADJECTIVES = ["Bronze", "Iron", "Steel", "Black", "Mithril", "Adamant", "Rune", "Dragon", "Orikalkum", "Necronium",
+              "Bane", "Elder rune", "Raw", "Cooked", "Burnt", "Grimy", "Clean", "Super", "Extreme", "Overload"]
+NOUNS = ["bar", "ore", "dart tip", "arrowheads", "bolts", "platebody", "platelegs", "full helm", "kiteshield",
+         "longsword", "battleaxe", "pickaxe", "hatchet", "shark", "lobster", "ranarr", "toadflax", "potion (4)",
+         "flask (6)", "logs", "plank", "nails", "seed", "charm", "pouch"]
+SUFFIXES = ["", " (damaged)", " + 1", " + 2", " (i)", " (or)"]
+
+
+def _names():
+    names = [f"{adjective} {noun}{suffix}" for adjective in ADJECTIVES for noun in NOUNS for suffix in SUFFIXES]
+    random.Random(SEED).shuffle(names)
+    return names
+
+
+def _skill_page(skill, names):
+    rng = random.Random(f"{SEED}-{skill}")
+    rows = "".join(
+        f'<tr><td><img src="/images/{i}.png"></td>'
+        f'<td><a href="/w/Exchange:{name.replace(" ", "_")}" title="{name}">{name}</a></td>'
+        f'<td>{rng.randint(1, 5_000_000):,}</td><td>{rng.uniform(-5, 5):+.1f}%</td></tr>'
+        for i, name in enumerate(names)
+    )
+    return (
+        f"<html><head><title>{skill}</title></head><body><div id='mw-content-text'>"
+        f"<p>{'Grand Exchange Market Watch. ' * 200}</p>"
+        f'<table class="wikitable sortable"><tr><th></th><th>Item</th><th>Price</th><th>Change</th></tr>'
+        f"{rows}</table></div></body></html>"
+    ).encode()
+
+
+def synthesize():
+    """Builds deterministic stand-ins shaped like the live responses: {path: bytes}"""
+    names = _names()
+    per_skill = len(names) // len(rs3_index.INDEX_SKILLS) + 40  # skills overlap, as on the wiki
+    responses = {}
+    for position, skill in enumerate(rs3_index.INDEX_SKILLS):
+        start = position * (len(names) // len(rs3_index.INDEX_SKILLS))
+        responses[INDEX_PATH + skill] = _skill_page(skill, (names * 2)[start:start + per_skill])
+
+    rng = random.Random(SEED)
+    now = int(time.time())
+    for game in ("rs3", "osrs"):
+        mapping, latest = [], {}
+        for item_id, name in enumerate(names, start=2):
+            value = rng.randint(1, 2_000_000)
+            mapping.append({"id": item_id, "name": name,
+                            "members": bool(item_id % 2), "value": value, "lowalch": value * 2 // 5,
+                            "highalch": value * 3 // 5, "limit": rng.choice([100, 1000, 5000, 10000, 25000])})
+            low = int(value * rng.uniform(0.5, 1.0))
+            latest[str(item_id)] = {"high": low + rng.randint(0, max(1, low // 10)), "highTime": now - rng.randint(0, 3600),
+                                    "low": low, "lowTime": now - rng.randint(0, 3600)}
+        responses[f"{API_PATH}{game}/mapping"] = json.dumps(mapping).encode()
+        responses[f"{API_PATH}{game}/latest"] = json.dumps({"data": latest}).encode()
+    return responses
+
+
+def timeseries(item_id, timestep, now=None):
+    """Deterministic /timeseries payload: a random walk of 365 points ending at the last complete step"""
+    step = osrs_api.TIMESTEPS[timestep]
+    end = (int(now if now is not None else time.time()) // step - 1) * step
+    rng = random.Random(f"{SEED}-{item_id}-{timestep}")
+    price = rng.randint(100, 2_000_000)
+    points = []
+    for timestamp in range(end - 364 * step, end + 1, step):
+        price = max(1, int(price * rng.uniform(0.97, 1.03)))
+        spread = max(1, int(price * rng.uniform(0.005, 0.04)))
+        points.append({"timestamp": timestamp, "avgHighPrice": price + spread, "avgLowPrice": price,
+                       "highPriceVolume": rng.randint(0, 5000), "lowPriceVolume": rng.randint(0, 5000)})
+    return json.dumps({"data": points, "itemId": item_id}).encode()
+
+
+def load_fixtures():
+    """Returns ({path: bytes}, exchange pages, source) preferring recorded fixtures over synthetic ones"""
+    responses = synthesize()
+    recorded = 0
+    for path in glob.glob(os.path.join(FIXTURES, "index", "*.html")):
+        with open(path, "rb") as f:
+            responses[INDEX_PATH + os.path.splitext(os.path.basename(path))[0]] = f.read()
+        recorded += 1
+    for path in glob.glob(os.path.join(FIXTURES, "api", "*.json")):
+        game, endpoint = os.path.splitext(os.path.basename(path))[0].split("_", 1)
+        with open(path, "rb") as f:
+            responses[f"{API_PATH}{game}/{endpoint}"] = f.read()
+        recorded += 1
+
+    exchange_paths = sorted(glob.glob(os.path.join(FIXTURES, "exchange", "*.html")))
+    exchange_source = "recorded" if exchange_paths else "hand-written"
+    exchange = []
+    for path in exchange_paths or sorted(glob.glob(os.path.join(SAMPLES, "exchange", "*.html"))):
+        with open(path, "rb") as f:
+            exchange.append(f.read())
+
+    source = "recorded" if recorded == len(responses) else "recorded + synthetic" if recorded else "synthetic"
+    if exchange_source != source:
+        source += f" + {exchange_source} Exchange"
+    return responses, exchange, source
+
+
+class StubWiki:
+    """Local HTTP server replaying wiki and prices API responses with a fixed per-request latency.
+
+    Skill pages carry an ETag and answer If-None-Match with 304, like the wiki.
+    Exchange pages are served for any title from the recorded (or hand-written) pages, and
+    /timeseries for any item ID. With a rate limit set, requests beyond it
+    within any one second get a 429.
+    """
+
+    def __init__(self, latency=0.02, rate_limit=0):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.responses, self.exchange, self.source = load_fixtures()
+        self.requests = 0
+        self.throttled = 0
+        self._recent = collections.deque()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _over_limit(self):
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and self._recent[0] <= now - 1:
+                self._recent.popleft()
+            if len(self._recent) >= self.rate_limit:
+                self.throttled += 1
+                return True
+            self._recent.append(now)
+            return False
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests += 1
+                time.sleep(stub.latency)
+                if stub._over_limit():
+                    self.send_response(429)
+                    self.send_header("Retry-After", "1")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                path = unquote(self.path)
+                if path.startswith(EXCHANGE_PATH):
+                    body = stub.exchange[int(hashlib.md5(path.encode()).hexdigest(), 16) % len(stub.exchange)]
+                elif path.startswith(API_PATH) and urlsplit(path).path.endswith("/timeseries"):
+                    query = parse_qs(urlsplit(path).query)
+                    body = timeseries(int(query["id"][0]), query["timestep"][0])
+                else:
+                    body = stub.responses.get(path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def install(self, cache_dir):
+        """Points every fetcher at this server and every cache at cache_dir"""
+        rs3_index.BASE_URL = self.url + INDEX_PATH
+        rs3_scraper.BASE_URL = self.url + EXCHANGE_PATH
+        rs3_api.BASE_URL = self.url + API_PATH + "rs3"
+        osrs_api.BASE_URL = self.url + API_PATH + "osrs"
+
+        rs3_index.CACHE_FILE = os.path.join(cache_dir, "rs3_index.bin")
+        rs3_index.LEGACY_CACHE_FILES = [os.path.join(cache_dir, "rs3_index.json")]
+        item_lookup.CACHE_FILE = os.path.join(cache_dir, "rs3_item_cache.json")
+        osrs_mapping.CACHE_FILE = os.path.join(cache_dir, "osrs_mapping.json")
+        price_history.DB_FILE = os.path.join(cache_dir, "{game}_price_history.db")
+
+
+def record():
+    """Saves live skill pages, Exchange pages of the watchlist items and API payloads into testing/fixtures"""
+    for directory in ("index", "exchange", "api"):
+        os.makedirs(os.path.join(FIXTURES, directory), exist_ok=True)
+
+    for skill in rs3_index.INDEX_SKILLS:
+        resp = transport.get(rs3_index.BASE_URL + skill, headers=rs3_index.HEADERS)
+        resp.raise_for_status()
+        with open(os.path.join(FIXTURES, "index", f"{skill}.html"), "wb") as f:
+            f.write(resp.content)
+        print(f"Recorded {skill}")
+
+    for item in rs3_watchlist.load_watchlist():
+        title = rs3_scraper.canonical_title(item["name"])
+        resp = transport.get(rs3_scraper.exchange_url(title), headers=rs3_scraper.HEADERS)
+        if resp.status_code == 404:
+            print(f"No Exchange page for {title}")
+            continue
+        resp.raise_for_status()
+        with open(os.path.join(FIXTURES, "exchange", title.replace(" ", "_").replace("/", "_") + ".html"), "wb") as f:
+            f.write(resp.content)
+        print(f"Recorded Exchange:{title}")
+
+    for game, module in (("rs3", rs3_api), ("osrs", osrs_api)):
+        for endpoint in ("latest", "mapping"):
+            resp = transport.get(f"{module.BASE_URL}/{endpoint}", headers=module.HEADERS)
+            resp.raise_for_status()
+            with open(os.path.join(FIXTURES, "api", f"{game}_{endpoint}.json"), "wb") as f:
+                f.write(resp.content)
+            print(f"Recorded {game} /{endpoint}")
+
+
+if __name__ == "__main__":
+    if "--record" in sys.argv:
+        record()
+    else:
+        print("Usage: python -m testing.stub_wiki --record")